@@ -0,0 +1,212 @@
+"""
+A module that contains a fake, recording implementation of the Tktable widget
+written in Tcl, used to benchmark the wrapper where Tk or Tktable (or a
+display) are not available.
+
+The fake keeps cells in the array given by -variable, answers the commands
+used by the wrapper and, in command mode, "redraws" the visible cells by
+calling the -command callback for each of them whenever the view scrolls.
+Every widget command is counted in ::faketable::calls.
+"""
+
+FAKE_TKTABLE = r"""
+package provide Tktable 2.10
+
+namespace eval ::faketable {
+    variable calls 0
+    variable cellcalls 0
+    variable aliases
+    array set aliases {
+        -browsecmd -browsecommand -valcmd -validatecommand
+        -selcmd -selectioncommand
+    }
+}
+
+if {[info commands destroy] eq ""} {
+    proc destroy {args} {
+        foreach w $args {
+            if {[info commands $w] ne ""} {rename $w {}}
+            array unset ::faketable::opt $w,*
+        }
+    }
+}
+
+if {[info commands bind] eq ""} {
+    proc bind {args} {}
+}
+
+if {[info commands bindtags] eq ""} {
+    proc bindtags {w {tags {}}} {
+        if {[llength $tags]} {
+            set ::faketable::bindtags($w) $tags
+        } elseif {[info exists ::faketable::bindtags($w)]} {
+            return $::faketable::bindtags($w)
+        } else {
+            return [list $w Table . all]
+        }
+    }
+}
+
+proc table {w args} {
+    variable ::faketable::opt
+    array set opt [list \
+        $w,-rows 10 $w,-cols 10 $w,-roworigin 0 $w,-colorigin 0 \
+        $w,-variable {} $w,-usecommand 0 $w,-command {} \
+        $w,-height 25 $w,-width 10 $w,-flashmode off \
+        $w,-titlerows 0 $w,-titlecols 0 \
+        $w,-browsecommand {} $w,-validatecommand {} $w,-selectioncommand {}]
+    set ::faketable::top($w) 0
+    ::faketable::configure $w $args
+    proc $w {cmd args} "::faketable::widget [list $w] \$cmd {*}\$args"
+    return $w
+}
+
+proc ::faketable::configure {w options} {
+    variable opt
+    variable aliases
+    foreach {key value} $options {
+        if {[info exists aliases($key)]} {set key $aliases($key)}
+        set opt($w,$key) $value
+    }
+}
+
+proc ::faketable::index {w index} {
+    variable opt
+    if {[regexp {^(-?\d+),(-?\d+)$} $index -> row col]} {
+        return [list $row $col]
+    }
+    set top [expr {$::faketable::top($w) + $opt($w,-roworigin)}]
+    switch -- $index {
+        origin - topleft {return [list $top $opt($w,-colorigin)]}
+        active - anchor {return [list $opt($w,-roworigin) $opt($w,-colorigin)]}
+        bottomright - end {
+            return [list \
+                [expr {min($top + $opt($w,-height), $opt($w,-rows)) - 1}] \
+                [expr {$opt($w,-colorigin) + $opt($w,-cols) - 1}]]
+        }
+    }
+    error "bad table index \"$index\""
+}
+
+proc ::faketable::redraw {w} {
+    variable opt
+    variable cellcalls
+    if {!$opt($w,-usecommand) || $opt($w,-command) eq ""} {return}
+    lassign [index $w topleft] top left
+    lassign [index $w bottomright] bottom right
+    set right [expr {min($right, $left + $opt($w,-width) - 1)}]
+    for {set row $top} {$row <= $bottom} {incr row} {
+        for {set col $left} {$col <= $right} {incr col} {
+            set script [string map [list %r $row %c $col %C $row,$col \
+                %i 0 %s "{}" %S "{}" %W $w] $opt($w,-command)]
+            uplevel #0 $script
+            incr cellcalls
+        }
+    }
+}
+
+proc ::faketable::view {w axis args} {
+    variable opt
+    variable top
+    if {![llength $args]} {
+        set rows [expr {max($opt($w,-rows), 1)}]
+        return [list [expr {double($top($w)) / $rows}] \
+            [expr {double(min($top($w) + $opt($w,-height), $rows)) / $rows}]]
+    }
+    if {$axis eq "y"} {
+        switch -- [lindex $args 0] {
+            scroll {
+                lassign $args - number what
+                set step [expr {[string match p* $what] ? $opt($w,-height) : 1}]
+                set top($w) [expr {max(0, min($opt($w,-rows) - 1,
+                    $top($w) + $number * $step))}]
+            }
+            moveto {
+                set top($w) [expr {int([lindex $args 1] * $opt($w,-rows))}]
+            }
+            default {
+                set row [lindex $args 0]
+                if {![string is integer -strict $row]} {
+                    set row [lindex [index $w $row] 0]
+                }
+                set top($w) [expr {$row - $opt($w,-roworigin)}]
+            }
+        }
+    }
+    redraw $w
+}
+
+proc ::faketable::widget {w cmd args} {
+    variable opt
+    variable calls
+    incr calls
+    switch -- $cmd {
+        configure {
+            if {[llength $args] > 1} {configure $w $args}
+            return
+        }
+        cget {
+            variable aliases
+            set key [lindex $args 0]
+            if {[info exists aliases($key)]} {set key $aliases($key)}
+            return $opt($w,$key)
+        }
+        set {
+            if {$opt($w,-variable) eq ""} {return}
+            upvar #0 $opt($w,-variable) cells
+            if {[llength $args] == 1} {return $cells([lindex $args 0])}
+            foreach {key value} $args {set cells($key) $value}
+            return
+        }
+        get {
+            upvar #0 $opt($w,-variable) cells
+            lassign [index $w [lindex $args 0]] row1 col1
+            if {[llength $args] == 1} {
+                if {[info exists cells($row1,$col1)]} {return $cells($row1,$col1)}
+                return {}
+            }
+            lassign [index $w [lindex $args 1]] row2 col2
+            set result {}
+            for {set row $row1} {$row <= $row2} {incr row} {
+                for {set col $col1} {$col <= $col2} {incr col} {
+                    if {[info exists cells($row,$col)]} {
+                        lappend result $cells($row,$col)
+                    } else {
+                        lappend result {}
+                    }
+                }
+            }
+            return $result
+        }
+        index {
+            lassign [index $w [lindex $args 0]] row col
+            switch -- [lindex $args 1] {
+                row {return $row}
+                col {return $col}
+                default {return $row,$col}
+            }
+        }
+        clear {
+            foreach index [lrange $args 1 end] {index $w $index}
+            return
+        }
+        xview {return [view $w x {*}$args]}
+        yview {return [view $w y {*}$args]}
+        version {return 2.10}
+        default {return}
+    }
+}
+"""
+
+
+def install(tk):
+    """Define the fake table command in the Tcl interpreter tk."""
+    tk.eval(FAKE_TKTABLE)
+
+
+def calls(tk):
+    """Return the number of widget commands and of cell callbacks made so
+    far."""
+    return int(tk.eval("set ::faketable::calls")), int(
+        tk.eval("set ::faketable::cellcalls")
+    )
@@ -0,0 +1,331 @@
+# pylint: disable=missing-function-docstring, protected-access, too-few-public-methods
+
+"""
+A module that runs the benchmarks of the hot paths of the wrapper and writes
+their results as JSON.
+
+Run it with "python -m benchmarks.run". The real Tktable widget is used when
+Tk, Tktable and a display (e.g. Xvfb, through xvfb-run) are available, and
+the fake one of benchmarks.fake_tktable otherwise. Use --compare to print
+the ratios against the results of a previous run.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+import tkinter
+
+from benchmarks import fake_tktable
+from tktable import (
+    ArrayVar,
+    ConditionalFormatter,
+    ListSource,
+    Negative,
+    RawCallback,
+    Table,
+    VirtualTable,
+)
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def make_root(backend):
+    """Return a (root, backend) pair, where backend is "real" or "fake"."""
+    if backend in ("auto", "real"):
+        try:
+            root = tkinter.Tk()
+            root.tk.call("package", "require", "Tktable")
+            root.withdraw()
+            return root, "real"
+        except tkinter.TclError:
+            if backend == "real":
+                raise
+    root = tkinter.Tcl()
+    fake_tktable.install(root.tk)
+    return root, "fake"
+
+
+def make_grid(rows, cols):
+    return [
+        [(row * cols + col) % 1000 - 500 for col in range(cols)] for row in range(rows)
+    ]
+
+
+def settle(table):
+    """Let the widget process its pending redraws."""
+    table.update_idletasks()
+
+
+class Run:
+    """The context shared by the benchmarks."""
+
+    def __init__(self, root, backend, repeat):
+        self.root = root
+        self.backend = backend
+        self.repeat = repeat
+
+    def measure(self, setup, func):
+        """Return the timings (in seconds) of repeat calls of func(state),
+        where state is returned by setup(), and the Tcl calls counted by the
+        fake widget during the last one."""
+        timings = []
+        calls = (0, 0)
+        for _ in range(self.repeat):
+            state = setup()
+            before = self.calls()
+            start = time.perf_counter()
+            func(state)
+            timings.append(time.perf_counter() - start)
+            after = self.calls()
+            calls = (after[0] - before[0], after[1] - before[1])
+            teardown = getattr(state, "destroy", None)
+            if teardown is not None:
+                teardown()
+        return timings, calls
+
+    def calls(self):
+        if self.backend != "fake":
+            return (0, 0)
+        return fake_tktable.calls(self.root.tk)
+
+    def table(self, rows, cols, **kw):
+        return Table(self.root, rows=rows, cols=cols, **kw)
+
+
+class _TableWithVar:
+    def __init__(self, run, rows, cols):
+        self.var = ArrayVar(run.root)
+        self.table = run.table(rows, cols, variable=self.var)
+
+    def destroy(self):
+        self.table.destroy()
+        self.var.unset()
+
+
+@benchmark
+def construct(run, rows, cols):
+    def func(_):
+        for _ in range(10):
+            run.table(rows, cols).destroy()
+
+    return run.measure(lambda: None, func), 10
+
+
+@benchmark
+def fill_setitem(run, rows, cols):
+    grid = make_grid(rows, cols)
+
+    def func(state):
+        var = state.var
+        for row, values in enumerate(grid):
+            for col, value in enumerate(values):
+                var[f"{row},{col}"] = value
+
+    return run.measure(lambda: _TableWithVar(run, rows, cols), func), rows * cols
+
+
+@benchmark
+def fill_load_grid(run, rows, cols):
+    grid = make_grid(rows, cols)
+
+    def func(state):
+        state.var.load_grid(grid)
+
+    return run.measure(lambda: _TableWithVar(run, rows, cols), func), rows * cols
+
+
+@benchmark
+def fill_table_load(run, rows, cols):
+    grid = make_grid(rows, cols)
+
+    def func(state):
+        state.table.load(grid)
+
+    return run.measure(lambda: _TableWithVar(run, rows, cols), func), rows * cols
+
+
+@benchmark
+def read_region(run, rows, cols):
+    grid = make_grid(rows, cols)
+
+    def setup():
+        state = _TableWithVar(run, rows, cols)
+        state.var.load_grid(grid)
+        return state
+
+    def func(state):
+        state.table.read_region((0, 0), (rows - 1, cols - 1))
+
+    return run.measure(setup, func), rows * cols
+
+
+@benchmark
+def tag_per_cell(run, rows, cols):
+    def func(state):
+        for row in range(0, rows, 2):
+            for col in range(cols):
+                state.table.tag_cell("odd", f"{row},{col}")
+
+    return run.measure(lambda: _TableWithVar(run, rows, cols), func), rows * cols // 2
+
+
+@benchmark
+def tag_rules(run, rows, cols):
+    grid = make_grid(rows, cols)
+
+    def func(state):
+        formatter = ConditionalFormatter(state.table)
+        formatter.add_rule(Negative("negative"))
+        formatter.apply(grid)
+
+    return run.measure(lambda: _TableWithVar(run, rows, cols), func), rows * cols
+
+
+@benchmark
+def scroll_command_mode(run, rows, cols):
+    source = ListSource(make_grid(rows, cols), cols)
+    # Only full pages are scrolled, so that each one redraws 25 rows.
+    pages = max(min(20, rows // 25 - 1), 1)
+
+    def setup():
+        return VirtualTable(run.root, source=source, height=25, width=cols)
+
+    def func(table):
+        for _ in range(pages):
+            table.yview_scroll("scroll", 1, "pages")
+            settle(table)
+
+    return run.measure(setup, func), pages * 25 * cols
+
+
+def _dispatch(run, option, callback, args):
+    """Time calls of the Tcl command registered for callback, from Tcl."""
+    count = 20000
+    values = dict(zip("rciCsSW", args))
+
+    def setup():
+        return run.table(10, 10, **{option: callback})
+
+    def func(table):
+        command = table.cget(option)
+        for field, value in values.items():
+            command = command.replace(f"%{field}", tkinter._stringify(value))
+        table.tk.call("time", command, count)
+
+    return run.measure(setup, func), count
+
+
+@benchmark
+def dispatch_event(run, rows, cols):  # pylint: disable=unused-argument
+    return _dispatch(
+        run, "browsecmd", lambda event: None, (1, 2, 0, "1,2", "", "", ".")
+    )
+
+
+@benchmark
+def dispatch_raw(run, rows, cols):  # pylint: disable=unused-argument
+    callback = RawCallback(lambda r, c, i, s: None, "rcis")
+    return _dispatch(run, "browsecmd", callback, (1, 2, 0, "1,2", "", "", "."))
+
+
+def parse_sizes(text):
+    sizes = []
+    for size in text.split(","):
+        rows, cols = size.lower().split("x")
+        sizes.append((int(rows), int(cols)))
+    return sizes
+
+
+def run_all(run, names, sizes, max_cells):
+    results = []
+    for name in names:
+        for rows, cols in sizes:
+            if name == "fill_setitem" and rows * cols > max_cells:
+                continue
+            (timings, calls), units = BENCHMARKS[name](run, rows, cols)
+            best = min(timings)
+            results.append(
+                {
+                    "name": name,
+                    "rows": rows,
+                    "cols": cols,
+                    "units": units,
+                    "best": best,
+                    "median": statistics.median(timings),
+                    "units_per_second": units / best if best else None,
+                    "tcl_calls": calls[0],
+                    "cell_callbacks": calls[1],
+                }
+            )
+            print(
+                f"{name:22} {rows:>7}x{cols:<4} best {best * 1000:10.3f} ms  "
+                f"{units / best if best else 0:14.0f} units/s",
+                file=sys.stderr,
+            )
+    return results
+
+
+def compare(results, path):
+    with open(path, encoding="utf-8") as file:
+        old = {(r["name"], r["rows"], r["cols"]): r for r in json.load(file)["results"]}
+    for result in results:
+        previous = old.get((result["name"], result["rows"], result["cols"]))
+        if previous and result["best"]:
+            ratio = previous["best"] / result["best"]
+            print(
+                f"{result['name']:22} {result['rows']:>7}x{result['cols']:<4} "
+                f"{ratio:6.2f}x {'faster' if ratio >= 1 else 'slower'}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=("auto", "real", "fake"), default="auto")
+    parser.add_argument("--sizes", default="100x10,1000x20,10000x20")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS))
+    parser.add_argument("--max-setitem-cells", type=int, default=200000)
+    parser.add_argument("--output", help="the JSON file to write the results to")
+    parser.add_argument("--compare", help="a JSON file written by a previous run")
+    args = parser.parse_args(argv)
+
+    root, backend = make_root(args.backend)
+    run = Run(root, backend, args.repeat)
+    results = run_all(
+        run,
+        args.only or list(BENCHMARKS),
+        parse_sizes(args.sizes),
+        args.max_setitem_cells,
+    )
+    report = {
+        "meta": {
+            "backend": backend,
+            "python": platform.python_version(),
+            "tcl": str(root.tk.call("info", "patchlevel")),
+            "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
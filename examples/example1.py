@@ -22,10 +22,11 @@ def main():
     root = Tk()
 
     var = ArrayVar(root)
-    for y in range(-1, 4):
-        for x in range(-1, 5):
-            index = f"{y:d},{x:d}"
-            var[index] = index
+    var.load_grid(
+        ([f"{y:d},{x:d}" for x in range(-1, 5)] for y in range(-1, 4)),
+        row_origin=-1,
+        col_origin=-1,
+    )
 
     label = Label(root, text="Proof-of-existence test for Tktable")
     label.pack(side="top", fill="x")
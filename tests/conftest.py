@@ -0,0 +1,13 @@
+import tkinter
+
+import pytest
+
+from benchmarks import fake_tktable
+
+
+@pytest.fixture
+def root():
+    """A Tcl interpreter (without Tk) in which the fake table is installed."""
+    root = tkinter.Tcl()
+    fake_tktable.install(root.tk)
+    return root
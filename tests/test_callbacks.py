@@ -0,0 +1,39 @@
+import gc
+
+import pytest
+
+from tktable import Table
+
+
+class Handler:
+    def __init__(self):
+        self.calls = 0
+
+    def browse(self, *_):
+        self.calls += 1
+        return "handled"
+
+
+@pytest.fixture
+def table(root):
+    return Table(root)
+
+
+def test_methods_of_temporary_objects_stay_alive(table):
+    table.configure(command=Handler().browse)
+    gc.collect()
+
+    command = str(table.cget("command")).split()[0]
+
+    assert table.tk.call(command, 1, "2,1", 0, 2, "", "", table._w) == "handled"
+
+
+def test_reconfiguring_releases_the_command(table):
+    handler = Handler()
+    table.configure(browsecommand=handler.browse)
+    table.configure(browsecommand=handler.browse)
+    assert len(table._callbacks) == 1
+
+    table.configure(browsecommand="")
+
+    assert len(table._callbacks) == 0
@@ -0,0 +1,69 @@
+import pytest
+
+from tktable import ColumnStore, FormulaEngine, VirtualTable
+
+numpy = pytest.importorskip("numpy")
+
+
+def _store(**columns):
+    store = ColumnStore()
+    for name, values in columns.items():
+        store.add_column(name, "d", numpy.array(values, dtype=float))
+    return store
+
+
+def test_edit_recomputes_and_redraws_dependents(root):
+    store = _store(price=[1, 2, 3], qty=[10, 10, 10])
+    engine = FormulaEngine(store)
+    table = VirtualTable(root, source=engine)
+    engine.define_column("total", "price * qty")
+    assert table._cell_command(1, 2, 0, "") == "20.0"
+
+    engine.set_cell(1, 0, "5")
+
+    assert list(store.column("total")) == [10, 50, 30]
+    assert table._cell_command(1, 2, 0, "") == "50.0"
+
+
+def test_total_cell_does_not_count_itself(root):
+    store = _store(x=[1, 2, 3, 0])
+    engine = FormulaEngine(store)
+    VirtualTable(root, source=engine)
+
+    engine.define_cell(3, "x", "sum(x)")
+    assert store.column("x")[3] == 6
+
+    engine.set_cell(1, 0, "2")
+    assert store.column("x")[3] == 6
+    engine.set_cell(1, 0, "5")
+    assert store.column("x")[3] == 9
+
+
+def test_recalculate_with_several_total_cells(root):
+    store = _store(x=[1, 2, 3, 0, 0])
+    engine = FormulaEngine(store)
+    VirtualTable(root, source=engine)
+    engine.define_cell(3, "x", "sum(x)")
+    engine.define_cell(4, "x", "max(x)")
+
+    engine.recalculate()
+
+    assert list(store.column("x")) == [1, 2, 3, 6, 3]
+
+
+def test_formula_cells_cannot_be_edited():
+    store = _store(x=[1, 2, 0])
+    engine = FormulaEngine(store)
+    engine.define_cell(2, "x", "max(x)")
+
+    engine.set_cell(2, 0, "100")
+
+    assert store.column("x")[2] == 2
+
+
+def test_unknown_columns_and_functions_are_rejected():
+    engine = FormulaEngine(_store(x=[1]))
+    with pytest.raises(ValueError):
+        engine.define_column("y", "z + 1")
+    with pytest.raises(ValueError):
+        engine.define_column("y", "__import__('os')")
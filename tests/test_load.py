@@ -0,0 +1,30 @@
+from tktable import ArrayVar, Table
+
+
+def _cells(variable):
+    return {key: str(variable[key]) for key in variable._tk.splitlist(variable.names())}
+
+
+def test_load_writes_none_as_empty_cells(root):
+    variable = ArrayVar(root)
+    table = Table(root, variable=variable)
+
+    count = table.load([["a", None, "c"], ["d", "e", "f"]])
+
+    assert count == 6
+    assert _cells(variable) == {
+        "0,0": "a",
+        "0,1": "",
+        "0,2": "c",
+        "1,0": "d",
+        "1,1": "e",
+        "1,2": "f",
+    }
+
+
+def test_load_grid_agrees_with_load(root):
+    variable = ArrayVar(root)
+
+    variable.load_grid([[None, 1, 2.5]])
+
+    assert _cells(variable) == {"0,0": "", "0,1": "1", "0,2": "2.5"}
@@ -0,0 +1,37 @@
+import pytest
+
+from tktable import Table
+
+
+@pytest.fixture
+def table(root):
+    return Table(root, rows=5, cols=3)
+
+
+def test_events_are_handled_after_the_class_bindings(table):
+    cache = table.option_cache
+
+    tags = table.bindtags()
+
+    assert tags.index("Table") < tags.index(f"TableOptionCache{id(cache)}")
+
+
+def test_configure_drops_the_options(table):
+    cache = table.option_cache
+    assert cache.dimensions() == (5, 3)
+
+    table.configure(rows=7)
+    table["cols"] = 9
+
+    assert cache.dimensions() == (7, 9)
+
+
+def test_destroy_deletes_the_binding_commands(table, root):
+    cache = table.option_cache
+    funcids = list(cache._funcids)
+    assert all(root.tk.call("info", "commands", funcid) for funcid in funcids)
+
+    table.destroy()
+
+    assert not any(root.tk.call("info", "commands", funcid) for funcid in funcids)
+    assert table._option_cache is None
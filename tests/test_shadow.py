@@ -0,0 +1,13 @@
+from tktable.shadow import ShadowModel
+
+
+def test_mixed_numbers_are_written_as_str_does():
+    model = ShadowModel(None)
+
+    assert model.diff([[1, 2.5], [3, 4]]) == {
+        "0,0": "1",
+        "0,1": "2.5",
+        "1,0": "3",
+        "1,1": "4",
+    }
+    assert model.diff([[1, 2.5], [3, 5]]) == {"1,1": "5"}
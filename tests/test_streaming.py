@@ -0,0 +1,13 @@
+import io
+
+from tktable.streaming import iter_records
+
+
+def _records(text):
+    return list(iter_records(io.BytesIO(text.encode()), "jsonl", [0]))
+
+
+def test_jsonl_keys_seen_later_get_new_columns():
+    rows = _records('{"a": 1, "b": 2}\n{"b": 3, "c": 4}\n{"a": null}\n')
+
+    assert rows == [[1, 2], [None, 3, 4], [None, None, None]]
@@ -0,0 +1,17 @@
+from tktable import ListSource, SortFilterView
+from tktable.view import _stable_order
+
+
+def test_none_values_are_last_in_both_orders():
+    values = [2, None, 1, 3, None, 1]
+
+    assert list(_stable_order(values, False)) == [2, 5, 0, 3, 1, 4]
+    assert list(_stable_order(values, True)) == [3, 0, 2, 5, 1, 4]
+
+
+def test_sort_by_a_column_missing_from_short_rows():
+    view = SortFilterView(ListSource([[1, "b"], [3], [2, "a"]]))
+
+    view.sort_by(1)
+
+    assert [view.get_cell(row, 0) for row in range(3)] == [2, 1, 3]
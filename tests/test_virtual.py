@@ -0,0 +1,15 @@
+from tktable import ColumnStore, VirtualTable
+
+
+def test_invalid_edits_are_rejected(root):
+    store = ColumnStore()
+    store.add_column("x", "d", [1.5, 2.5])
+    store.add_column("n", "l", [1, 2])
+    table = VirtualTable(root, source=store)
+
+    assert table._cell_command(0, 0, 1, "abc") == "1.5"
+    assert table._cell_command(1, 1, 1, "") == "2"
+    assert table._cell_command(0, 0, 1, "4") == "4"
+
+    assert list(store.column("x")) == [4.0, 2.5]
+    assert list(store.column("n")) == [1, 2]
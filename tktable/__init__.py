@@ -1,3 +1,29 @@
 # pylint: disable=missing-module-docstring
+from tktable.aio import AsyncBridge, AsyncSource
 from tktable.array_var import ArrayVar
-from tktable.table import Table
+from tktable.autosize import ColumnAutoSizer
+from tktable.callbacks import CellEvent, RawCallback
+from tktable.column_store import OBJECT, ColumnStore
+from tktable.formatting import (
+    ConditionalFormatter,
+    Negative,
+    Predicate,
+    Rule,
+    Threshold,
+    TopN,
+)
+from tktable.formulas import FormulaEngine
+from tktable.option_cache import OptionCache
+from tktable.prefetch import Prefetcher
+from tktable.profiling import Profiler
+from tktable.ring import LogTable, RingBuffer
+from tktable.scheduler import UpdateScheduler
+from tktable.search import SearchIndex
+from tktable.selection import CellRange, Selection
+from tktable.shadow import ShadowModel
+from tktable.spans import SpanManager, grouped_spans
+from tktable.streaming import StreamLoader
+from tktable.table import Table, preload
+from tktable.view import SortFilterView
+from tktable.virtual import DataSource, ListSource, VirtualTable
+from tktable.widget_pool import WidgetColumn
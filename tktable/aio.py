@@ -0,0 +1,246 @@
+# pylint: disable=missing-function-docstring, protected-access, too-few-public-methods
+# pylint: disable=too-many-instance-attributes, too-many-arguments
+
+"""
+A module that contains a bridge running an asyncio event loop within the Tk
+event loop, and a data source of virtual tables whose blocks of rows are
+fetched asynchronously.
+"""
+
+import asyncio
+import collections
+import functools
+import logging
+
+from tktable.virtual import DataSource
+
+logger = logging.getLogger(__name__)
+
+
+class _Marker:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+# The values of the cells whose block is being fetched, or failed to be.
+PENDING = _Marker("PENDING")
+FAILED = _Marker("FAILED")
+
+
+class AsyncBridge:
+    """Run the asyncio event loop loop (a new one by default) cooperatively
+    with the Tk event loop: every interval milliseconds, the callbacks of the
+    loop that are ready run once, on the Tk thread, so that they can use the
+    widgets. widget is any widget, used to schedule the iterations."""
+
+    def __init__(self, widget, loop=None, interval=10):
+        self.widget = widget
+        self._owns_loop = loop is None
+        self.loop = asyncio.new_event_loop() if loop is None else loop
+        self.interval = interval
+        self._after_id = None
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.interval, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def run_once(self):
+        """Run the callbacks of the loop that are ready, without blocking."""
+        loop = self.loop
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+
+    def _tick(self):
+        self.run_once()
+        self._after_id = self.widget.after(self.interval, self._tick)
+
+    def submit(self, coro):
+        """Schedule the coroutine coro and return its task. The bridge is
+        started if needed."""
+        self.start()
+        return self.loop.create_task(coro)
+
+    def close(self):
+        """Stop the bridge, cancel the pending tasks and, if the loop was
+        created by the bridge, close it."""
+        self.stop()
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        if self._owns_loop:
+            self.loop.close()
+
+
+class AsyncSource(DataSource):
+    """A data source for a VirtualTable reading its rows from provider, whose
+    get_block method is a coroutine function. provider must also have the
+    row_count and col_count methods of DataSource, and may have a
+    format_value one.
+
+    Rows are fetched by blocks of block_rows rows, once per block, through
+    bridge (an AsyncBridge). Until a block arrives, its cells show
+    placeholder and, when it does, they are redrawn. The fetches requested
+    while the table is redrawn are started together, when Tk is idle, and
+    the ones of blocks that have scrolled out of view (by more than margin
+    blocks) are cancelled. Cells whose block could not be fetched show
+    error_text until clear is called. The last max_blocks blocks fetched are
+    kept."""
+
+    def __init__(
+        self,
+        provider,
+        bridge,
+        *,
+        block_rows=64,
+        placeholder="...",
+        error_text="#ERROR",
+        margin=1,
+        max_blocks=256,
+    ):
+        self.provider = provider
+        self.bridge = bridge
+        self.block_rows = block_rows
+        self.placeholder = placeholder
+        self.error_text = error_text
+        self.margin = margin
+        self.max_blocks = max_blocks
+        self.table = None
+        self._shape = (provider.row_count(), provider.col_count())
+        self._blocks = collections.OrderedDict()
+        self._tasks = {}
+        self._requested = set()
+        self._idle_id = None
+
+    def attach(self, table):
+        """Called by the VirtualTable using the source."""
+        self.table = table
+
+    def row_count(self):
+        return self._shape[0]
+
+    def col_count(self):
+        return self._shape[1]
+
+    def refresh(self):
+        """Read the dimensions of the provider again."""
+        self._shape = (self.provider.row_count(), self.provider.col_count())
+
+    def get_cell(self, row, col):
+        block = row // self.block_rows
+        rows = self._blocks.get(block)
+        if rows is None:
+            self._request(block)
+            return PENDING
+        self._blocks.move_to_end(block)
+        if rows is FAILED:
+            return FAILED
+        values = rows[row - block * self.block_rows]
+        return values[col] if col < len(values) else None
+
+    def format_value(self, col, value):
+        if value is PENDING:
+            return self.placeholder
+        if value is FAILED:
+            return self.error_text
+        if hasattr(self.provider, "format_value"):
+            return self.provider.format_value(col, value)
+        return DataSource.format_value(self, col, value)
+
+    @property
+    def pending(self):
+        """The number of blocks being fetched."""
+        return len(self._tasks)
+
+    def _request(self, block):
+        if block in self._tasks or block in self._requested:
+            return
+        self._requested.add(block)
+        if self.table is None:
+            self._dispatch()
+        elif self._idle_id is None:
+            self._idle_id = self.table.after_idle(self._dispatch)
+
+    def _visible_blocks(self):
+        """Return the first and last blocks to keep fetching."""
+        table = self.table
+        if table is None:
+            return 0, self._shape[0] // self.block_rows
+        top = table.index("topleft", "row") - table._row_origin
+        bottom = table.index("bottomright", "row") - table._row_origin
+        return (
+            top // self.block_rows - self.margin,
+            bottom // self.block_rows + self.margin,
+        )
+
+    def _dispatch(self):
+        self._idle_id = None
+        first, last = self._visible_blocks()
+        for block, task in list(self._tasks.items()):
+            if not first <= block <= last:
+                task.cancel()
+        requested, self._requested = self._requested, set()
+        for block in sorted(requested):
+            if first <= block <= last:
+                self._fetch(block)
+            else:
+                # Drop the placeholders cached for the cells of the block.
+                self._redraw(block)
+
+    def _block_rows(self, block):
+        first = block * self.block_rows
+        return first, min(first + self.block_rows, self._shape[0]) - 1
+
+    def _fetch(self, block):
+        first, last = self._block_rows(block)
+        coro = self.provider.get_block(first, 0, last, self._shape[1] - 1)
+        task = self.bridge.submit(coro)
+        task.add_done_callback(functools.partial(self._fetched, block))
+        self._tasks[block] = task
+
+    def _fetched(self, block, task):
+        if self._tasks.get(block) is not task:
+            return
+        del self._tasks[block]
+        if not task.cancelled():
+            exc = task.exception()
+            if exc is None:
+                self._blocks[block] = list(task.result())
+            else:
+                logger.warning("Could not fetch block %d", block, exc_info=exc)
+                self._blocks[block] = FAILED
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        self._redraw(block)
+
+    def _redraw(self, block):
+        if self.table is not None:
+            first, last = self._block_rows(block)
+            if first <= last:
+                self.table.invalidate_rows(first, last)
+
+    def clear(self):
+        """Cancel the fetches and forget the blocks fetched, so that they are
+        fetched again when shown."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._requested.clear()
+        self._blocks.clear()
+        if self.table is not None:
+            self.table.invalidate()
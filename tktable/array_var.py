@@ -7,7 +7,93 @@ which are, in some instances, required by tktable.
 
 import tkinter
 
-from tktable.utils import _setup_master
+from tktable import profiling
+from tktable.utils import CHUNK_SIZE, _grid_chunks, _setup_master
+
+# An estimate of the bytes used by Tcl for each element of an array, besides
+# its key and value strings: the hash entry, the variable and the value object.
+_ELEMENT_OVERHEAD = 120
+
+# A Tcl lambda returning the total length of the keys and values of an array.
+_ARRAY_CHARS = """{name} {
+    upvar #0 $name array
+    set n 0
+    foreach {key value} [array get array] {
+        incr n [string length $key]
+        incr n [string length $value]
+    }
+    return $n
+}"""
+
+# A Tcl lambda recording the keys written or unset in an array, used as its
+# trace: a whole unset array (empty name2) is recorded as an empty key.
+_RECORD = """{dirty name1 name2 op} {
+    upvar #0 $dirty keys
+    lappend keys $name2
+}"""
+
+# A Tcl lambda returning what changed in the array var since the last call:
+# 1 if it was unset, and 0 and a flat list of key, exists and value triples
+# otherwise.
+_CHANGES = """{var dirty} {
+    upvar #0 $var cells $dirty keys
+    if {![info exists keys] || ![llength $keys]} {
+        return {0 {}}
+    }
+    set changed [lsort -unique $keys]
+    set keys {}
+    if {[lindex $changed 0] eq ""} {
+        return {1 {}}
+    }
+    set result {}
+    foreach key $changed {
+        if {[info exists cells($key)]} {
+            lappend result $key 1 $cells($key)
+        } else {
+            lappend result $key 0 {}
+        }
+    }
+    return [list 0 $result]
+}"""
+
+
+class _ArrayChanges:
+    """Record the keys of the Tcl array variable which are written or unset,
+    with a trace written in Tcl, so that the changes can be read back with a
+    single call rather than a Python callback per write."""
+
+    def __init__(self, tk, variable):
+        self.tk = tk
+        self.variable = variable
+        self._keys = f"::tktable_changes{id(self)}"
+        self._script = ("apply", _RECORD, self._keys)
+
+    def start(self):
+        """Start recording, forgetting the keys recorded so far."""
+        self.stop()
+        self.tk.call(
+            "trace", "add", "variable", self.variable, "write unset", self._script
+        )
+        self.tk.call("set", self._keys, "")
+
+    def stop(self):
+        self.tk.call(
+            "trace", "remove", "variable", self.variable, "write unset", self._script
+        )
+        self.tk.call("unset", "-nocomplain", self._keys)
+
+    def take(self):
+        """Return the changes recorded since the last call, and forget them:
+        None if the array was unset (recording then restarts), and a flat
+        list of key, exists and value triples otherwise."""
+        reset, triples = self.tk.splitlist(
+            self.tk.call("apply", _CHANGES, self.variable, self._keys)
+        )
+        if int(reset):
+            # Unsetting the array removed the trace.
+            self.start()
+            return None
+        return self.tk.splitlist(triples)
 
 
 class ArrayVar(tkinter.Variable):
@@ -17,6 +103,8 @@ class ArrayVar(tkinter.Variable):
     some dict operations.
     """
 
+    _profiler = None
+
     # pylint: disable=super-init-not-called  # TODO: can this be solve more properly?
     def __init__(self, master=None, name=None):
         # Tkinter.Variable.__init__ is not called on purpose! I don't wanna
@@ -41,9 +129,28 @@ class ArrayVar(tkinter.Variable):
     def __setitem__(self, key, value):
         self.set(**{str(key): value})
 
+    def memory_usage(self):
+        """Return an estimate of the number of bytes used by the array in the
+        Tcl interpreter. The key and value lengths are summed by Tcl, so the
+        contents of the array are not copied to Python."""
+        chars = self._tk.call("apply", _ARRAY_CHARS, self._name)
+        return int(chars) + len(self) * _ELEMENT_OVERHEAD
+
     def names(self):
         return self._tk.call("array", "names", self._name)
 
+    def enable_profiling(self, profiler=None):
+        """Profile the public methods of the array and the Tcl calls they
+        make, and return the profiler (a new profiling.Profiler if none is
+        given)."""
+        if profiler is None:
+            profiler = profiling.Profiler()
+        profiling.instrument(self, profiler, "_tk")
+        return profiler
+
+    def disable_profiling(self):
+        profiling.uninstrument(self, "_tk")
+
     def get(self, key=None):
         if key is None:
             flatten_pairs = self._tk.call("array", "get", str(self))
@@ -54,6 +161,27 @@ class ArrayVar(tkinter.Variable):
     def set(self, **kw):
         self._tk.call("array", "set", str(self), tkinter._flatten(list(kw.items())))
 
+    def load_grid(self, data, row_origin=0, col_origin=0, chunk_size=CHUNK_SIZE):
+        """Set the cells of a 2D grid, given as a list of lists, a 2D NumPy
+        array or an iterator over rows, so that data[0][0] is stored at the
+        index "row_origin,col_origin".
+
+        The cells are written with a few "array set" calls of roughly
+        chunk_size cells each, rather than one call per cell. Return the
+        number of cells written."""
+        count = 0
+        for flat in _grid_chunks(data, row_origin, col_origin, chunk_size):
+            self._tk.call("array", "set", self._name, flat)
+            count += len(flat) // 2
+        return count
+
+    def update(self, pairs):
+        """Set the elements given by a mapping or an iterable of key, value
+        pairs with a single "array set" call."""
+        if hasattr(pairs, "items"):
+            pairs = pairs.items()
+        self._tk.call("array", "set", self._name, tkinter._flatten(list(pairs)))
+
     def unset(self, pattern=None):
         """Unsets all of the elements in the array. If pattern is given, only
         the elements that match pattern are unset."""
@@ -0,0 +1,191 @@
+# pylint: disable=too-few-public-methods, too-many-arguments
+# pylint: disable=too-many-instance-attributes
+
+"""
+A module that contains the fitting of the widths of the columns of a table
+to their content, measured with font metrics.
+"""
+
+from tktable.array_var import _ArrayChanges
+from tktable.utils import _index, _parse_index
+
+# A Tcl lambda returning the width in pixels of each string of a list.
+_MEASURE = """{font strings} {
+    set widths {}
+    foreach string $strings {
+        lappend widths [font measure $font $string]
+    }
+    return $widths
+}"""
+
+# A Tcl lambda returning the flat key, value list of the given keys of an
+# array, skipping the keys which are not set.
+_READ_KEYS = """{var keys} {
+    upvar #0 $var cells
+    set result {}
+    foreach key $keys {
+        if {[info exists cells($key)]} {
+            lappend result $key $cells($key)
+        }
+    }
+    return $result
+}"""
+
+
+class TextMeasurer:
+    """Measure the width of strings in pixels, caching the widths by (font,
+    string), so that each distinct string is only measured once per font.
+    The strings which are not cached are measured with a single Tcl call.
+    The cache is cleared when it has more than max_entries entries."""
+
+    def __init__(self, widget, max_entries=100000):
+        self.widget = widget
+        self.max_entries = max_entries
+        self.cache = {}
+
+    def measure(self, font, strings):
+        """Return the list of the widths of strings in font."""
+        cache = self.cache
+        missing = list({string for string in strings if (font, string) not in cache})
+        if missing:
+            if len(cache) + len(missing) > self.max_entries:
+                cache.clear()
+            tk = self.widget.tk
+            widths = tk.splitlist(tk.call("apply", _MEASURE, font, missing))
+            for string, width in zip(missing, widths):
+                cache[(font, string)] = int(width)
+        return [cache[(font, string)] for string in strings]
+
+
+class ColumnAutoSizer:
+    """Fit the widths of the columns of table to the widest of their cells,
+    read from its array (variable, or the one of its variable option) and
+    measured in font (the font of the table by default) by a TextMeasurer.
+
+    The widths are set in pixels, padding included, with a single width
+    call. If the table has more than sample_rows rows, only sample_rows rows
+    evenly spread over the table (and its title rows) are measured. The
+    width of each measured cell is kept, with the maximum of each column,
+    so that sync only measures the cells edited since the last fit or sync
+    and only sets the widths which changed."""
+
+    def __init__(
+        self,
+        table,
+        variable=None,
+        *,
+        font=None,
+        padding=8,
+        sample_rows=10000,
+        max_width=None,
+    ):
+        self.table = table
+        name = str(variable) if variable is not None else str(table.cget("variable"))
+        if not name:
+            raise ValueError("A ColumnAutoSizer requires a table with a variable.")
+        self.variable = name
+        self.font = str(font if font is not None else table.cget("font"))
+        self.padding = padding
+        self.sample_rows = sample_rows
+        self.max_width = max_width
+        self.measurer = TextMeasurer(table)
+        self._widths = {}
+        self._max = {}
+        self._changes = _ArrayChanges(table.tk, name)
+
+    def _columns(self):
+        first = int(self.table.cget("colorigin"))
+        return range(first, first + int(self.table.cget("cols")))
+
+    def _read(self, cols):
+        """Return the flat key, value list of the cells to measure."""
+        table, tk = self.table, self.table.tk
+        rows = int(table.cget("rows"))
+        if self.sample_rows is None or rows <= self.sample_rows:
+            return tk.splitlist(tk.call("array", "get", self.variable))
+        first = int(table.cget("roworigin"))
+        titles = int(table.cget("titlerows"))
+        step = rows / self.sample_rows
+        sample = set(range(first, first + titles))
+        sample.update(first + int(i * step) for i in range(self.sample_rows))
+        keys = [_index(row, col) for row in sorted(sample) for col in cols]
+        return tk.splitlist(tk.call("apply", _READ_KEYS, self.variable, keys))
+
+    def fit(self, cols=None):
+        """Measure the cells of the columns cols (all by default), set their
+        widths and return them as a dict mapping columns to pixels."""
+        cols = list(self._columns() if cols is None else cols)
+        self._changes.start()
+        wanted = set(cols)
+        pairs = self._read(cols)
+        cells = []
+        for i in range(0, len(pairs), 2):
+            cell = _parse_index(str(pairs[i]))
+            if cell is not None and cell[1] in wanted:
+                cells.append((cell, str(pairs[i + 1])))
+        for col in cols:
+            self._widths[col] = {}
+        widths = self.measurer.measure(self.font, [value for _, value in cells])
+        for ((row, col), _), width in zip(cells, widths):
+            self._widths[col][row] = width
+        for col in cols:
+            self._max[col] = max(self._widths[col].values(), default=0)
+        return self.apply(cols)
+
+    def sync(self):
+        """Measure the cells of the fitted columns which changed since the
+        last fit or sync, set the widths which changed and return them."""
+        triples = self._changes.take()
+        if triples is None:
+            return self.fit(list(self._widths))
+        cells = self._changed_cells(triples)
+        values = [value for _, value in cells if value is not None]
+        widths = iter(self.measurer.measure(self.font, values))
+        changed, stale = set(), set()
+        for (row, col), value in cells:
+            column = self._widths[col]
+            old = column.pop(row, 0)
+            new = 0 if value is None else next(widths)
+            if new:
+                column[row] = new
+            if new > self._max[col]:
+                self._max[col] = new
+                changed.add(col)
+            elif new < old == self._max[col]:
+                # The widest cell shrank: the maximum must be found again.
+                stale.add(col)
+        for col in stale:
+            width = max(self._widths[col].values(), default=0)
+            if width != self._max[col]:
+                self._max[col] = width
+                changed.add(col)
+        return self.apply(sorted(changed))
+
+    def _changed_cells(self, triples):
+        """Return the ((row, col), value) of the changed cells of the fitted
+        columns, where value is None if the cell was unset."""
+        cells = []
+        for i in range(0, len(triples), 3):
+            cell = _parse_index(str(triples[i]))
+            if cell is not None and cell[1] in self._widths:
+                value = str(triples[i + 2]) if int(triples[i + 1]) else None
+                cells.append((cell, value))
+        return cells
+
+    def apply(self, cols):
+        """Set the widths of the columns cols from their measured cells, with
+        one width call, and return them."""
+        widths = {}
+        for col in cols:
+            width = self._max[col] + self.padding
+            if self.max_width is not None:
+                width = min(width, self.max_width)
+            widths[col] = width
+        if widths:
+            # Negative widths are in pixels.
+            self.table.width(**{str(col): -width for col, width in widths.items()})
+        return widths
+
+    def close(self):
+        """Stop recording the edits of the array."""
+        self._changes.stop()
@@ -0,0 +1,102 @@
+# pylint: disable=missing-function-docstring, protected-access
+
+"""
+A module that contains the queue of table operations used by Table.batch.
+"""
+
+import tkinter
+
+from tktable.utils import _index, _parse_index
+
+
+class Batch:
+    """Queue the set, tag cell, width, height and spans operations of a table
+    and merge them, so that they can be sent as a single Tcl script.
+
+    Operations of the same kind are merged into one command, the last value
+    given for a cell, column, row or span winning. This does not change the
+    result, because a cell holds one value and at most one cell tag."""
+
+    def __init__(self, table):
+        self.table = table
+        self.cells = {}
+        self.cell_tags = {}
+        self.widths = {}
+        self.heights = {}
+        self.spans = {}
+
+    def __len__(self):
+        return (
+            len(self.cells)
+            + len(self.cell_tags)
+            + len(self.widths)
+            + len(self.heights)
+            + len(self.spans)
+        )
+
+    def set_cells(self, flat):
+        """Queue flattened index, value pairs."""
+        cells = self.cells
+        for i in range(0, len(flat), 2):
+            cells[str(flat[i])] = flat[i + 1]
+
+    def set_line(self, rc, index, values):
+        """Queue values set into the subsequent columns (if rc is "row") or
+        rows (if rc is "col") starting at index."""
+        row, col = self.table._coords(index)
+        cells = self.cells
+        for offset, value in enumerate(values):
+            if rc == "row":
+                cells[_index(row, col + offset)] = value
+            else:
+                cells[_index(row + offset, col)] = value
+
+    def tag_cell(self, tagname, indexes):
+        cell_tags = self.cell_tags
+        for index in indexes:
+            coords = _parse_index(index)
+            cell_tags[_index(*coords) if coords else index] = tagname
+
+    def width(self, pairs):
+        self.widths.update(pairs)
+
+    def height(self, pairs):
+        self.heights.update(pairs)
+
+    def span(self, pairs):
+        self.spans.update(pairs)
+
+    def commands(self):
+        """Return the merged commands as tuples of arguments."""
+        widget = self.table._w
+        commands = []
+        for name, pairs in (
+            ("width", self.widths),
+            ("height", self.heights),
+            ("spans", self.spans),
+            ("set", self.cells),
+        ):
+            if pairs:
+                commands.append((widget, name) + tkinter._flatten(list(pairs.items())))
+        by_tag = {}
+        for index, tagname in self.cell_tags.items():
+            by_tag.setdefault(tagname, []).append(index)
+        for tagname, indexes in by_tag.items():
+            commands.append((widget, "tag", "cell", tagname) + tuple(indexes))
+        return commands
+
+    def flush(self):
+        """Send the queued operations as one Tcl script and empty the queue.
+        Return the number of commands sent."""
+        commands = self.commands()
+        if commands:
+            self.table.tk.eval("\n".join(tkinter._join(cmd) for cmd in commands))
+        for queued in (
+            self.cells,
+            self.cell_tags,
+            self.widths,
+            self.heights,
+            self.spans,
+        ):
+            queued.clear()
+        return len(commands)
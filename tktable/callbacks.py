@@ -0,0 +1,158 @@
+# pylint: disable=too-few-public-methods, protected-access
+
+"""
+A module that contains the raw calling convention for the table callbacks
+whose arguments are %-substituted (command, browsecommand, validatecommand
+and selectioncommand), and the registry of the Tcl commands of the callbacks
+of a table.
+"""
+
+import inspect
+import weakref
+
+# The substitutions that are passed to raw callbacks as ints.
+_INT_FIELDS = frozenset("cir")
+_FIELDS = "cCirsSW"
+
+# The abbreviated names of the callback options.
+ALIASES = {
+    "browsecmd": "browsecommand",
+    "selcmd": "selectioncommand",
+    "valcmd": "validatecommand",
+}
+
+
+class CellEvent:
+    """A compact event passed to raw callbacks created with event=True.
+
+    Only the attributes named by the fields of the RawCallback are set, plus
+    widget. r, c and i are ints, while C, s, S and W are the strings given by
+    Tcl (W is the path name of the widget, not the widget itself)."""
+
+    __slots__ = ("widget", "c", "C", "i", "r", "s", "S", "W")
+
+    def __init__(self, widget):
+        self.widget = widget
+
+
+class RawCallback:
+    """Mark a callable so that it is invoked with only the substitutions it
+    needs, without the tkinter.Event built for the other table callbacks.
+
+    fields is a string of substitution letters (see the Tktable manual),
+    e.g. "rcis" for the row, column, set flag and value of a command
+    callback. The callable receives them as positional arguments in that
+    order, or as the attributes of a single CellEvent if event is true.
+
+    For example, Table(command=RawCallback(func, "rcis")) calls
+    func(row, col, set_flag, value) for each cell."""
+
+    __slots__ = ("func", "fields", "event")
+
+    def __init__(self, func, fields="rcis", event=False):
+        if not callable(func):
+            raise TypeError(f"{func!r} is not callable")
+        unknown = set(fields) - set(_FIELDS)
+        if not fields or unknown:
+            raise ValueError(
+                f"Invalid substitution fields {fields!r}: use letters of {_FIELDS!r}"
+            )
+        self.func = func
+        self.fields = fields
+        self.event = event
+
+    @property
+    def format(self):
+        """The substitution format appended to the Tcl command."""
+        return " ".join(f"%{field}" for field in self.fields)
+
+    def subst(self, widget):
+        """Return the function that converts the substituted strings into
+        the arguments of func, or None if no conversion is needed."""
+        fields = self.fields
+        if self.event:
+
+            def to_event(*args):
+                event = CellEvent(widget)
+                for field, value in zip(fields, args):
+                    setattr(event, field, int(value) if field in _INT_FIELDS else value)
+                return (event,)
+
+            return to_event
+        if fields == "rcis":
+            return lambda r, c, i, s: (int(r), int(c), int(i), s)
+        if fields == "rc":
+            return lambda r, c: (int(r), int(c))
+        ints = [field in _INT_FIELDS for field in fields]
+        if not any(ints):
+            return None
+        return lambda *args: [
+            int(value) if is_int else value for is_int, value in zip(ints, args)
+        ]
+
+
+def _weak_target(func, owner):
+    """Return the function to register for func, and the key identifying
+    func. Methods of owner are held weakly, so that the commands registered
+    by a widget for its own methods do not keep it alive: other callables
+    are held strongly, as by Misc._register."""
+    if not inspect.ismethod(func) or func.__self__ is not owner:
+        return func, func
+    ref = weakref.WeakMethod(func)
+
+    def call_method(*args):
+        method = ref()
+        if method is not None:
+            return method(*args)
+        # Tcl would get "None", e.g. as the value of a cell.
+        return ""
+
+    call_method.__name__ = func.__name__
+    # Weak methods to the same living method are equal, and hash alike.
+    return call_method, ref
+
+
+class CallbackRegistry:
+    """The Tcl commands registered for the callback options of a widget.
+
+    A command is shared by all the options set to the same callable with the
+    same substitution, and is deleted once no option uses it anymore, so that
+    reconfiguring a callback does not leak commands. The methods of the
+    widget itself are held weakly, to not create a reference cycle."""
+
+    def __init__(self, widget):
+        self.widget = widget
+        # option name -> key, and key -> [command name, number of options].
+        self._options = {}
+        self._commands = {}
+
+    def __len__(self):
+        return len(self._commands)
+
+    def register(self, option, func, subst=None, key=None):
+        """Return the name of the Tcl command calling func (through subst, as
+        for Misc._register) for option, registering it if needed. key
+        identifies subst, since a new one is usually made for each call."""
+        option = ALIASES.get(option, option)
+        target, func_key = _weak_target(func, self.widget)
+        key = (func_key, key)
+        entry = self._commands.get(key)
+        if entry is None:
+            entry = self._commands[key] = [self.widget._register(target, subst), 0]
+        if self._options.get(option) != key:
+            entry[1] += 1
+            self.release(option)
+            self._options[option] = key
+        return entry[0]
+
+    def release(self, option):
+        """Forget the callback of option, deleting its command if no other
+        option uses it."""
+        key = self._options.pop(ALIASES.get(option, option), None)
+        if key is None:
+            return
+        entry = self._commands[key]
+        entry[1] -= 1
+        if not entry[1]:
+            del self._commands[key]
+            self.widget.deletecommand(entry[0])
@@ -0,0 +1,153 @@
+# pylint: disable=missing-function-docstring
+
+"""
+A module that contains a compact, column-oriented data source, which keeps
+each column in a typed buffer instead of one Tcl array element per cell.
+"""
+
+import array
+import sys
+
+from tktable.utils import numpy
+from tktable.virtual import DataSource
+
+# The dtype of columns holding arbitrary Python objects (e.g. strings).
+OBJECT = "object"
+
+_FLOAT_TYPECODES = frozenset("fd")
+
+
+def _converter(dtype):
+    if numpy is not None and isinstance(dtype, numpy.dtype):
+        return dtype.type if dtype.kind != "O" else lambda value: value
+    if dtype == OBJECT:
+        return lambda value: value
+    if dtype in _FLOAT_TYPECODES:
+        return float
+    return int
+
+
+def _make_formatter(formatter):
+    if formatter is None:
+        return str
+    if isinstance(formatter, str):
+        spec = formatter
+        return lambda value: format(value, spec)
+    return formatter
+
+
+class ColumnStore(DataSource):
+    """A data source storing each column in its own buffer: an array.array
+    of the given typecode, a NumPy array, or a list if dtype is OBJECT.
+
+    Each column has a formatter, which is either a callable or a format
+    spec (e.g. ".2f") and is used by format_value. This costs a few bytes
+    per numeric cell, where a Tcl array needs a hash entry, a key string and
+    a value object per cell (see memory_usage and ArrayVar.memory_usage)."""
+
+    def __init__(self):
+        self.names = []
+        self.columns = []
+        self.dtypes = []
+        self._formatters = []
+        self._converters = []
+        self._rows = 0
+
+    def add_column(self, name, dtype="d", values=None, formatter=None):
+        """Add a column and return its number. values can be any iterable
+        (or a NumPy array, which is kept as is) and must have as many values
+        as there are rows, if there are columns already. Without values, the
+        column is filled with zeros (or None, for OBJECT columns)."""
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            column = values
+            dtype = values.dtype
+        elif dtype == OBJECT:
+            column = list(values) if values is not None else [None] * self._rows
+        else:
+            if values is None:
+                values = bytes(array.array(dtype).itemsize * self._rows)
+                column = array.array(dtype, values)
+            else:
+                column = array.array(dtype, values)
+        if self.columns and len(column) != self._rows:
+            raise ValueError(
+                f"Column {name!r} has {len(column)} values, but the store has "
+                f"{self._rows} rows."
+            )
+        self._rows = len(column)
+        self.names.append(name)
+        self.columns.append(column)
+        self.dtypes.append(dtype)
+        self._formatters.append(_make_formatter(formatter))
+        self._converters.append(_converter(dtype))
+        return len(self.columns) - 1
+
+    def set_formatter(self, col, formatter):
+        self._formatters[col] = _make_formatter(formatter)
+
+    def column(self, col):
+        """Return the buffer of column col, which can be a name or a number."""
+        if isinstance(col, str):
+            col = self.names.index(col)
+        return self.columns[col]
+
+    def append_row(self, values):
+        """Append a row. Appending to NumPy columns copies them, so prefer
+        add_column for bulk data."""
+        if len(values) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} values, got {len(values)}.")
+        for col, value in enumerate(values):
+            column = self.columns[col]
+            value = self._converters[col](value)
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                self.columns[col] = numpy.append(column, value)
+            else:
+                column.append(value)
+        self._rows += 1
+
+    def extend_rows(self, rows):
+        for values in rows:
+            self.append_row(values)
+
+    def row_count(self):
+        return self._rows
+
+    def col_count(self):
+        return len(self.columns)
+
+    def get_cell(self, row, col):
+        return self.columns[col][row]
+
+    def get_block(self, first_row, first_col, last_row, last_col):
+        slices = []
+        for column in self.columns[first_col : last_col + 1]:
+            part = column[first_row : last_row + 1]
+            slices.append(part.tolist() if hasattr(part, "tolist") else part)
+        return [list(values) for values in zip(*slices)]
+
+    def set_cell(self, row, col, value):
+        """Store value, converted to the dtype of column col. Raise
+        ValueError if it cannot be converted (e.g. "abc" in a numeric
+        column), which a VirtualTable treats as a rejected edit."""
+        self.columns[col][row] = self._converters[col](value)
+
+    def format_value(self, col, value):
+        if value is None:
+            return ""
+        return self._formatters[col](value)
+
+    def memory_usage(self):
+        """Return a dict mapping each column name to the number of bytes used
+        by its buffer (and, for OBJECT columns, by the objects themselves),
+        plus a "total" item."""
+        usage = {}
+        for name, column in zip(self.names, self.columns):
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                size = column.nbytes
+            elif isinstance(column, array.array):
+                size = sys.getsizeof(column)
+            else:
+                size = sys.getsizeof(column) + sum(map(sys.getsizeof, column))
+            usage[name] = size
+        usage["total"] = sum(usage.values())
+        return usage
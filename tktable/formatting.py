@@ -0,0 +1,217 @@
+# pylint: disable=missing-function-docstring
+
+"""
+A module that contains a rules engine which tags the cells of a table
+according to their values, column by column.
+"""
+
+import math
+import operator
+
+from tktable.utils import _index, numpy
+
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _as_floats(values):
+    """Convert a column to floats (NaN for non-numeric values), as a NumPy
+    array if NumPy is installed and as a list otherwise."""
+    if numpy is None:
+        return [_to_float(value) for value in values]
+    try:
+        return numpy.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return numpy.array([_to_float(value) for value in values], dtype=float)
+
+
+class Rule:
+    """Base class of the formatting rules.
+
+    A rule gives tag to the cells of columns (all columns if None) for which
+    mask is true. tag_options, if given, are passed to tag_configure when
+    the rule is added to a ConditionalFormatter."""
+
+    def __init__(self, tag, columns=None, **tag_options):
+        self.tag = tag
+        self.columns = None if columns is None else frozenset(columns)
+        self.tag_options = tag_options
+
+    def applies_to(self, col):
+        return self.columns is None or col in self.columns
+
+    def mask(self, values):
+        """Return a sequence of booleans telling which of the values of a
+        column get the tag."""
+        raise NotImplementedError
+
+
+class Threshold(Rule):
+    """Tag the numeric values for which "value op threshold" holds, where op
+    is one of <, <=, >, >=, == and !=."""
+
+    def __init__(self, tag, op, threshold, columns=None, **tag_options):
+        super().__init__(tag, columns, **tag_options)
+        if op not in _OPERATORS:
+            raise ValueError(f"Unknown operator {op!r}: use one of {list(_OPERATORS)}")
+        self.op = _OPERATORS[op]
+        self.threshold = threshold
+
+    def mask(self, values):
+        floats = _as_floats(values)
+        if numpy is not None:
+            return self.op(floats, self.threshold)
+        return [self.op(value, self.threshold) for value in floats]
+
+
+class Negative(Threshold):
+    """Tag the negative numeric values."""
+
+    def __init__(self, tag, columns=None, **tag_options):
+        super().__init__(tag, "<", 0, columns, **tag_options)
+
+
+class TopN(Rule):
+    """Tag the n largest (or smallest, if largest is false) numeric values of
+    each column."""
+
+    def __init__(self, tag, n, largest=True, columns=None, **tag_options):
+        super().__init__(tag, columns, **tag_options)
+        self.n = n
+        self.largest = largest
+
+    def mask(self, values):
+        floats = _as_floats(values)
+        count = len(floats)
+        if numpy is not None:
+            signed = floats if self.largest else -floats
+            keys = numpy.where(numpy.isnan(signed), -math.inf, signed)
+            result = numpy.zeros(count, dtype=bool)
+            if self.n > 0:
+                top = numpy.argsort(keys, kind="stable")[::-1][: self.n]
+                result[top] = keys[top] > -math.inf
+            return result
+        sign = 1 if self.largest else -1
+        keys = [-math.inf if math.isnan(v) else sign * v for v in floats]
+        result = [False] * count
+        for i in sorted(range(count), key=keys.__getitem__, reverse=True)[: self.n]:
+            result[i] = keys[i] > -math.inf
+        return result
+
+
+class Predicate(Rule):
+    """Tag the values for which func returns true. If vectorized is true,
+    func is called once per column with all of its values and must return
+    the mask itself."""
+
+    def __init__(self, tag, func, columns=None, vectorized=False, **tag_options):
+        super().__init__(tag, columns, **tag_options)
+        self.func = func
+        self.vectorized = vectorized
+
+    def mask(self, values):
+        if self.vectorized:
+            return self.func(values)
+        return [bool(self.func(value)) for value in values]
+
+
+class ConditionalFormatter:
+    """Apply formatting rules to the cells of a table.
+
+    Each cell gets the tag of the first rule (in the order they were added)
+    that matches it. apply evaluates the rules column by column and sends
+    only the cells whose tag changed since the previous call, with one tag
+    cell command per tag inside a single batch."""
+
+    def __init__(self, table, row_origin=0, col_origin=0):
+        self.table = table
+        self.row_origin = row_origin
+        self.col_origin = col_origin
+        self.rules = []
+        self._applied = {}
+
+    def add_rule(self, rule):
+        if rule.tag_options:
+            self.table.tag_configure(rule.tag, **rule.tag_options)
+        self.rules.append(rule)
+        return rule
+
+    def remove_rule(self, rule):
+        self.rules.remove(rule)
+
+    def _columns(self, grid):
+        if numpy is not None and isinstance(grid, numpy.ndarray):
+            return [grid[:, col] for col in range(grid.shape[1])]
+        rows = [list(row) for row in grid]
+        ncols = max((len(row) for row in rows), default=0)
+        return [
+            [row[col] if col < len(row) else None for row in rows]
+            for col in range(ncols)
+        ]
+
+    def evaluate(self, grid):
+        """Return a dict mapping the (row, col) of the cells matched by the
+        rules, relative to the grid, to their tag."""
+        result = {}
+        for col, values in enumerate(self._columns(grid)):
+            rules = [rule for rule in self.rules if rule.applies_to(col)]
+            # Later rules are applied first so that earlier ones override them.
+            for rule in reversed(rules):
+                mask = rule.mask(values)
+                if numpy is not None:
+                    rows = numpy.flatnonzero(numpy.asarray(mask, dtype=bool)).tolist()
+                else:
+                    rows = [row for row, matched in enumerate(mask) if matched]
+                for row in rows:
+                    result[row, col] = rule.tag
+        return result
+
+    def apply(self, grid):
+        """Evaluate the rules over grid (a list of lists or a 2D NumPy array)
+        and update the cell tags of the table. Return the number of cells
+        whose tag changed."""
+        new = self.evaluate(grid)
+        old = self._applied
+        changes = {}
+        for cell, tag in new.items():
+            if old.get(cell) != tag:
+                changes.setdefault(tag, []).append(cell)
+        for cell in old.keys() - new.keys():
+            changes.setdefault("", []).append(cell)
+        row_origin, col_origin = self.row_origin, self.col_origin
+        count = 0
+        with self.table.batch():
+            for tag, cells in changes.items():
+                self.table.tag_cell(
+                    tag,
+                    *(_index(row + row_origin, col + col_origin) for row, col in cells),
+                )
+                count += len(cells)
+        self._applied = new
+        return count
+
+    def clear(self):
+        """Remove the tags set by the rules from the table."""
+        if self._applied:
+            row_origin, col_origin = self.row_origin, self.col_origin
+            self.table.tag_cell(
+                "",
+                *(
+                    _index(row + row_origin, col + col_origin)
+                    for row, col in self._applied
+                ),
+            )
+        self._applied = {}
@@ -0,0 +1,437 @@
+# pylint: disable=missing-function-docstring, protected-access, too-few-public-methods
+
+"""
+A module that contains a formula layer over a ColumnStore: columns and cells
+defined by expressions over other columns, recomputed incrementally along
+their dependency graph when an input cell is edited.
+"""
+
+import ast
+import concurrent.futures
+import math
+import sys
+
+from tktable.column_store import OBJECT
+from tktable.utils import _index, _require_numpy, numpy
+from tktable.virtual import DataSource
+
+# The functions which make an expression depend on whole columns rather than
+# on the same row of its inputs.
+AGGREGATES = frozenset(
+    ("sum", "mean", "min", "max", "std", "cumsum", "cumprod", "shift", "diff")
+)
+
+_ELEMENTWISE = frozenset(
+    ("abs", "sqrt", "log", "exp", "round", "where", "minimum", "maximum", "clip")
+)
+
+_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Subscript,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+)
+if sys.version_info < (3, 9):
+    _NODES += (ast.Index,)
+
+# The rows of a column which all changed.
+ALL = None
+
+
+def _shift(values, periods=1):
+    result = numpy.full(len(values), numpy.nan)
+    if periods >= 0:
+        result[periods:] = values[: len(values) - periods]
+    else:
+        result[:periods] = values[-periods:]
+    return result
+
+
+def _diff(values, periods=1):
+    return values - _shift(values, periods)
+
+
+def _numpy_functions():
+    return {
+        "sum": numpy.sum,
+        "mean": numpy.mean,
+        "min": numpy.min,
+        "max": numpy.max,
+        "std": numpy.std,
+        "cumsum": numpy.cumsum,
+        "cumprod": numpy.cumprod,
+        "shift": _shift,
+        "diff": _diff,
+        "abs": numpy.abs,
+        "sqrt": numpy.sqrt,
+        "log": numpy.log,
+        "exp": numpy.exp,
+        "round": numpy.round,
+        "where": numpy.where,
+        "minimum": numpy.minimum,
+        "maximum": numpy.maximum,
+        "clip": numpy.clip,
+    }
+
+
+_SCALAR_FUNCTIONS = {
+    "abs": abs,
+    "sqrt": math.sqrt,
+    "log": math.log,
+    "exp": math.exp,
+    "round": round,
+    "where": lambda condition, yes, no: yes if condition else no,
+    "minimum": min,
+    "maximum": max,
+    "clip": lambda value, low, high: min(max(value, low), high),
+}
+
+
+def _evaluate(code, columns):
+    """Evaluate code (a code object, or the source of a checked Formula for
+    worker processes, which cannot receive code objects) over whole columns
+    (NumPy arrays)."""
+    namespace = _numpy_functions()
+    namespace.update(columns)
+    return eval(code, {"__builtins__": {}}, namespace)  # pylint: disable=eval-used
+
+
+class Formula:
+    """A parsed expression, and the columns it depends on.
+
+    The expression can use the names of columns (which must be identifiers),
+    numbers, arithmetic and comparison operators, the functions of
+    AGGREGATES and abs, sqrt, log, exp, round, where, minimum, maximum and
+    clip, and name[row] to refer to a single cell. It is elementwise, i.e.
+    row i of the result only depends on row i of its inputs, unless it uses
+    an aggregate or a single cell."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        tree = ast.parse(expression, mode="eval")
+        self.elementwise = True
+        for node in ast.walk(tree):
+            if not isinstance(node, _NODES):
+                raise ValueError(
+                    f"Unsupported syntax in {expression!r}: {type(node).__name__}"
+                )
+            if isinstance(node, ast.Call):
+                name = getattr(node.func, "id", None)
+                if name not in AGGREGATES and name not in _ELEMENTWISE:
+                    raise ValueError(f"Unknown function in {expression!r}")
+                if name in AGGREGATES:
+                    self.elementwise = False
+            elif isinstance(node, ast.Subscript):
+                self.elementwise = False
+        functions = {
+            id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)
+        }
+        self.columns = {
+            node.id
+            for node in ast.walk(tree)
+            if isinstance(node, ast.Name) and id(node) not in functions
+        }
+        self.code = compile(tree, f"<formula {expression!r}>", "eval")
+
+    def evaluate_row(self, values):
+        """Evaluate an elementwise formula for one row, given the values of
+        its input columns in that row."""
+        namespace = dict(_SCALAR_FUNCTIONS)
+        namespace.update(values)
+        return eval(  # pylint: disable=eval-used
+            self.code, {"__builtins__": {}}, namespace
+        )
+
+
+def _dependencies(nodes):
+    """Return a dict mapping the key of each node of nodes to the set of the
+    keys of the nodes computing the columns it reads."""
+    producers = {}
+    for key, node in nodes.items():
+        producers.setdefault(node.column, []).append(key)
+    return {
+        key: {
+            producer
+            for column in node.formula.columns
+            for producer in producers.get(column, ())
+            if producer != key
+            # Cell formulas do not read the formula cells (see _inputs).
+            and (node.row is None or nodes[producer].row is None)
+        }
+        for key, node in nodes.items()
+    }
+
+
+class _Node:
+    __slots__ = ("formula", "column", "row")
+
+    def __init__(self, formula, column, row=None):
+        self.formula = formula
+        self.column = column
+        self.row = row
+
+
+class FormulaEngine(DataSource):
+    """A data source over the ColumnStore store in which some columns, or
+    cells, are computed from formulas (see Formula).
+
+    Edits (e.g. made in a VirtualTable, through set_cell) recompute only the
+    formulas depending on the edited column, in the order of the dependency
+    graph: elementwise column formulas only for the edited rows, and the
+    others entirely, with NumPy, over whole columns. Formula cells cannot be
+    edited. If processes is positive, a full recalculate evaluates the
+    independent column formulas in a pool of that many processes, which pays
+    off for expensive formulas over large columns."""
+
+    def __init__(self, store, *, processes=0):
+        self.store = store
+        self.table = None
+        self.processes = processes
+        self._executor = None
+        self._nodes = {}
+        self._order = []
+
+    # The DataSource interface, delegated to the store.
+
+    def attach(self, table):
+        self.table = table
+
+    def row_count(self):
+        return self.store.row_count()
+
+    def col_count(self):
+        return self.store.col_count()
+
+    def get_cell(self, row, col):
+        return self.store.get_cell(row, col)
+
+    def get_block(self, first_row, first_col, last_row, last_col):
+        return self.store.get_block(first_row, first_col, last_row, last_col)
+
+    def format_value(self, col, value):
+        return self.store.format_value(col, value)
+
+    def set_cell(self, row, col, value):
+        name = self.store.names[col]
+        if name in self._nodes or (name, row) in self._nodes:
+            return
+        self.store.set_cell(row, col, value)
+        self._redraw(self.propagate({name: {row}}))
+
+    # Formulas.
+
+    def define_column(self, name, expression, dtype="d", formatter=None):
+        """Add the column name, computed by expression, to the store and
+        return its number. dtype is "d" (floats) or OBJECT."""
+        formula = self._parse(expression)
+        if name in self.store.names:
+            raise ValueError(f"The store already has a column {name!r}.")
+        rows = self.store.row_count()
+        if numpy is not None:
+            values = numpy.zeros(rows, dtype=object if dtype == OBJECT else float)
+        else:
+            values = [None] * rows if dtype == OBJECT else [0.0] * rows
+        col = self.store.add_column(name, dtype, values, formatter)
+        self._add(name, _Node(formula, name))
+        self._compute(self._nodes[name], ALL)
+        if self.table is not None:
+            self.table.refresh()
+        return col
+
+    def define_cell(self, row, name, expression):
+        """Compute the cell at row in the column name with expression, which
+        is evaluated over whole columns and should give a single value. The
+        formula cells (e.g. this one) are left out of the columns it reads, so
+        that define_cell(last_row, "x", "sum(x)") is the total of x."""
+        _require_numpy()
+        formula = self._parse(expression)
+        if name in self._nodes:
+            raise ValueError(f"The column {name!r} is computed by a formula.")
+        self._add((name, row), _Node(formula, name, row))
+        self._compute(self._nodes[(name, row)], ALL)
+        self._redraw(self.propagate({name: {row}}))
+
+    def remove(self, name, row=None):
+        """Remove the formula of the column name, or of its cell at row. The
+        values computed so far are kept."""
+        self._nodes.pop(name if row is None else (name, row))
+        self._order = self._sort(self._nodes)
+
+    def formula(self, name, row=None):
+        node = self._nodes.get(name if row is None else (name, row))
+        return None if node is None else node.formula.expression
+
+    def _parse(self, expression):
+        formula = Formula(expression)
+        missing = formula.columns - set(self.store.names)
+        if missing:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(missing))}")
+        if not formula.elementwise:
+            _require_numpy()
+        return formula
+
+    def _add(self, key, node):
+        nodes = dict(self._nodes)
+        nodes[key] = node
+        self._order = self._sort(nodes)
+        self._nodes = nodes
+
+    @staticmethod
+    def _sort(nodes):
+        """Return the keys of nodes in the order of their dependencies."""
+        depends = _dependencies(nodes)
+        order = []
+        ready = [key for key, deps in depends.items() if not deps]
+        while ready:
+            key = ready.pop()
+            order.append(key)
+            for other, deps in depends.items():
+                if key in deps:
+                    deps.remove(key)
+                    if not deps:
+                        ready.append(other)
+        if len(order) != len(nodes):
+            raise ValueError("The formulas have a circular dependency.")
+        return order
+
+    def propagate(self, changed):
+        """Recompute the formulas depending on the changed columns, a dict
+        mapping column names to the set of their changed rows (or ALL), and
+        return the changes, including those given."""
+        changed = dict(changed)
+        for key in self._order:
+            node = self._nodes[key]
+            inputs = [changed[name] for name in node.formula.columns if name in changed]
+            if not inputs:
+                continue
+            rows = ALL
+            if node.row is None and node.formula.elementwise and ALL not in inputs:
+                rows = set().union(*inputs)
+            rows = self._compute(node, rows)
+            previous = changed.get(node.column, set())
+            if rows is ALL or previous is ALL:
+                changed[node.column] = ALL
+            else:
+                changed[node.column] = previous | rows
+        return changed
+
+    def _columns(self, names):
+        return {name: numpy.asarray(self.store.column(name)) for name in names}
+
+    def _inputs(self, names):
+        """Return the columns read by a cell formula, as masked arrays in which
+        the formula cells are masked: a total does not count itself, nor the
+        other totals of the column."""
+        columns = self._columns(names)
+        masks = {
+            name: numpy.zeros(len(values), bool) for name, values in columns.items()
+        }
+        for node in self._nodes.values():
+            if node.row is not None and node.column in masks:
+                masks[node.column][node.row] = True
+        return {
+            name: numpy.ma.array(values, mask=masks[name])
+            for name, values in columns.items()
+        }
+
+    def _compute(self, node, rows):
+        """Compute node for rows (or all of them), return the rows changed."""
+        store = self.store
+        col = store.names.index(node.column)
+        if node.row is not None:
+            value = _evaluate(node.formula.code, self._inputs(node.formula.columns))
+            if value is numpy.ma.masked:
+                value = numpy.nan
+            store.set_cell(node.row, col, value)
+            return {node.row}
+        if rows is ALL and not node.formula.elementwise:
+            _require_numpy()
+        if rows is not ALL or numpy is None:
+            indexes = range(store.row_count()) if rows is ALL else rows
+            cols = {name: store.names.index(name) for name in node.formula.columns}
+            column = store.columns[col]
+            for row in indexes:
+                values = {name: store.get_cell(row, c) for name, c in cols.items()}
+                column[row] = node.formula.evaluate_row(values)
+            return rows
+        result = _evaluate(node.formula.code, self._columns(node.formula.columns))
+        self._store_column(col, result)
+        return ALL
+
+    def _store_column(self, col, result):
+        column = self.store.columns[col]
+        if numpy.ndim(result) == 0:
+            result = numpy.full(len(column), result)
+        column[:] = result
+
+    def recalculate(self):
+        """Recompute all the formulas, in a process pool if processes is
+        positive, and redraw the table."""
+        _require_numpy()
+        if self.processes > 0 and self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.processes)
+        depends = _dependencies(self._nodes)
+        done = set()
+        pending = list(self._order)
+        while pending:
+            batch = [key for key in pending if depends[key] <= done]
+            if not batch:
+                raise ValueError("The formulas have a circular dependency.")
+            self._compute_batch(batch)
+            done.update(batch)
+            pending = [key for key in pending if key not in done]
+        if self.table is not None:
+            self.table.invalidate()
+
+    def _compute_batch(self, batch):
+        columns = [key for key in batch if self._nodes[key].row is None]
+        if self._executor is None or len(columns) < 2:
+            for key in batch:
+                self._compute(self._nodes[key], ALL)
+            return
+        futures = {
+            key: self._executor.submit(
+                _evaluate,
+                self._nodes[key].formula.expression,
+                self._columns(self._nodes[key].formula.columns),
+            )
+            for key in columns
+        }
+        for key in batch:
+            node = self._nodes[key]
+            if key in futures:
+                col = self.store.names.index(node.column)
+                self._store_column(col, futures[key].result())
+            else:
+                self._compute(node, ALL)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _redraw(self, changed):
+        table = self.table
+        if table is None:
+            return
+        row_origin, col_origin = table._row_origin, table._col_origin
+        last_row = self.store.row_count() - 1 + row_origin
+        for name, rows in changed.items():
+            col = self.store.names.index(name) + col_origin
+            if rows is ALL:
+                table.invalidate(_index(row_origin, col), _index(last_row, col))
+            elif rows:
+                # One call per column: redrawing a few extra cells is cheaper
+                # than a call per row.
+                table.invalidate(
+                    _index(min(rows) + row_origin, col),
+                    _index(max(rows) + row_origin, col),
+                )
@@ -0,0 +1,161 @@
+# pylint: disable=missing-function-docstring, protected-access
+
+"""
+A module that contains a cache of the options and cells of a table which are
+read often, converted to Python types, to avoid a Tcl call per read.
+"""
+
+from tktable.utils import _parse_index
+
+# The integer options read, all at once, by an OptionCache.
+INT_OPTIONS = ("rows", "cols", "roworigin", "colorigin", "titlerows", "titlecols")
+
+# The Tk class of tables, whose bindings handle the EVENTS.
+_CLASS = "Table"
+
+# The events after which the active and anchor cells may have been changed by
+# the bindings of the table.
+EVENTS = ("<KeyPress>", "<ButtonPress>", "<B1-Motion>", "<ButtonRelease>")
+
+# A Tcl lambda returning the values of the given options of a widget.
+_CGET = """{w args} {
+    set values {}
+    foreach option $args {
+        lappend values [$w cget -$option]
+    }
+    return $values
+}"""
+
+# A Tcl lambda returning the active and anchor cells of a table, each one
+# empty if the table has none.
+_CELLS = """{w} {
+    set cells {}
+    foreach index {active anchor} {
+        if {[catch {$w index $index} cell]} {
+            set cell {}
+        }
+        lappend cells $cell
+    }
+    return $cells
+}"""
+
+# A Tcl lambda returning the current options of a tag, as a flat list of
+# option names (without dash) and values.
+_TAG_OPTIONS = """{w tag} {
+    set options {}
+    foreach description [$w tag configure $tag] {
+        lappend options [string range [lindex $description 0] 1 end]
+        lappend options [lindex $description end]
+    }
+    return $options
+}"""
+
+
+class OptionCache:
+    """Cache the integer options of table (see INT_OPTIONS) as ints, its
+    active and anchor cells as (row, col) tuples (or None) and the options
+    of its tags as dicts mapping option names to values.
+
+    Each group is read with a single Tcl call when it is first needed and
+    kept until the table changes it: the methods of Table which change
+    options, tags, rows, cols or cells drop the affected entries, and so do
+    the EVENTS delivered to the table, for the active and anchor cells, once
+    the class bindings of the table have handled them.
+    Changes made in Tcl directly are not seen: call invalidate after them.
+    close removes the bindings, and is called when the table is destroyed."""
+
+    def __init__(self, table):
+        self.table = table
+        self._options = None
+        self._cells = None
+        self._tags = {}
+        # The class bindings of the table move the active and anchor cells,
+        # so the cached ones are dropped by a bind tag placed after them.
+        self._tag = tag = f"TableOptionCache{id(self)}"
+        tags = list(table.bindtags())
+        position = tags.index(_CLASS) + 1 if _CLASS in tags else 1
+        table.bindtags(tuple(tags[:position] + [tag] + tags[position:]))
+        # Class bindings belong to the interpreter, not to the table, so their
+        # commands are deleted by close rather than by destroy.
+        self._funcids = [table.bind_class(tag, event, self._event) for event in EVENTS]
+
+    def _event(self, _event):
+        self._cells = None
+
+    def close(self):
+        """Remove the bind tag of the cache, its class bindings and their
+        commands. The cached values are dropped and no longer kept up to
+        date by the events."""
+        table = self.table
+        for event, funcid in zip(EVENTS, self._funcids):
+            table.unbind_class(self._tag, event)
+            table.deletecommand(funcid)
+        self._funcids = []
+        table.bindtags(tuple(tag for tag in table.bindtags() if tag != self._tag))
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop all the cached values."""
+        self._options = None
+        self._cells = None
+        self._tags = {}
+
+    def options_changed(self):
+        self._options = None
+        # Changing the dimensions or the origins can move the active cell.
+        self._cells = None
+
+    def cells_changed(self):
+        self._cells = None
+
+    def tag_changed(self, tagname):
+        self._tags.pop(str(tagname), None)
+
+    def get(self, option):
+        """Return the value of the integer option (see INT_OPTIONS)."""
+        if self._options is None:
+            tk = self.table.tk
+            values = tk.splitlist(tk.call("apply", _CGET, self.table._w, *INT_OPTIONS))
+            self._options = dict(zip(INT_OPTIONS, map(tk.getint, values)))
+        return self._options[option]
+
+    def dimensions(self):
+        """Return the (rows, cols) of the table."""
+        return self.get("rows"), self.get("cols")
+
+    def origins(self):
+        """Return the (roworigin, colorigin) of the table."""
+        return self.get("roworigin"), self.get("colorigin")
+
+    def titles(self):
+        """Return the (titlerows, titlecols) of the table."""
+        return self.get("titlerows"), self.get("titlecols")
+
+    def _read_cells(self):
+        if self._cells is None:
+            tk = self.table.tk
+            cells = tk.splitlist(tk.call("apply", _CELLS, self.table._w))
+            self._cells = tuple(_parse_index(str(cell)) for cell in cells)
+        return self._cells
+
+    def active(self):
+        """Return the (row, col) of the active cell, or None."""
+        return self._read_cells()[0]
+
+    def anchor(self):
+        """Return the (row, col) of the anchor cell, or None."""
+        return self._read_cells()[1]
+
+    def tag_options(self, tagname):
+        """Return a dict mapping the options of the tag tagname (without
+        dash) to their current value. The dict must not be modified."""
+        tagname = str(tagname)
+        options = self._tags.get(tagname)
+        if options is None:
+            tk = self.table.tk
+            values = tk.splitlist(
+                tk.call("apply", _TAG_OPTIONS, self.table._w, tagname)
+            )
+            values = [str(value) for value in values]
+            options = self._tags[tagname] = dict(zip(values[::2], values[1::2]))
+        return options
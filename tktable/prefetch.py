@@ -0,0 +1,236 @@
+# pylint: disable=missing-function-docstring, protected-access
+# pylint: disable=too-many-instance-attributes, too-many-arguments
+
+"""
+A module that contains a prefetcher which follows the viewport of a virtual
+table and reads the blocks about to be shown into its cell cache on a thread
+pool.
+"""
+
+import concurrent.futures
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Read ahead of the viewport of the VirtualTable table.
+
+    Every interval milliseconds (see start and stop), the viewport is read,
+    the scroll velocity is updated and the blocks of block_rows rows and
+    block_cols cols (all the cols by default) that will likely be shown next
+    are read from the source with get_block, and formatted, on a pool of
+    worker threads, then stored in the cell cache of the table by the Tk
+    thread. The blocks read are those of the next lookahead pages in the
+    direction of the scroll (half on each side when it does not scroll), or
+    of the rows reached in horizon seconds at the current velocity if more.
+
+    At most max_cells cells (half of the cell cache by default) are read
+    ahead at a time, so that the visible cells are not evicted. The source
+    must support get_block (and format_value) being called from threads
+    while its table is shown."""
+
+    def __init__(
+        self,
+        table,
+        *,
+        lookahead=2.0,
+        horizon=0.5,
+        block_rows=64,
+        block_cols=None,
+        max_cells=None,
+        workers=2,
+        interval=50,
+    ):
+        self.table = table
+        self.lookahead = lookahead
+        self.horizon = horizon
+        self.block_rows = block_rows
+        self.block_cols = block_cols
+        if max_cells is None:
+            max_cells = table.cell_cache.maxsize // 2
+        self.max_cells = max_cells
+        self.interval = interval
+        self.velocity = (0.0, 0.0)
+        self.blocks_read = 0
+        self.cells_read = 0
+        self.cancelled = 0
+        self.discarded = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix="tktable-prefetch"
+        )
+        self._pending = {}
+        self._viewport = None
+        self._after_id = None
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.table.after(self.interval, self._tick)
+
+    def stop(self):
+        """Stop following the viewport and cancel the reads not started."""
+        if self._after_id is not None:
+            self.table.after_cancel(self._after_id)
+            self._after_id = None
+        for future, _ in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    def close(self):
+        self.stop()
+        self._executor.shutdown(wait=False)
+
+    def _tick(self):
+        self._after_id = None
+        self.poll()
+        self._after_id = self.table.after(self.interval, self._tick)
+
+    def _read_viewport(self):
+        table = self.table
+        top, left = table._coords("topleft")
+        bottom, right = table._coords("bottomright")
+        return (
+            top - table._row_origin,
+            left - table._col_origin,
+            bottom - table._row_origin,
+            right - table._col_origin,
+            time.perf_counter(),
+        )
+
+    def poll(self):
+        """Store the blocks read so far and read the next ones, as done every
+        interval milliseconds once started."""
+        self._collect()
+        viewport = self._read_viewport()
+        previous = self._viewport
+        if previous is not None:
+            elapsed = max(viewport[4] - previous[4], 1e-3)
+            self.velocity = (
+                0.5 * self.velocity[0] + 0.5 * (viewport[0] - previous[0]) / elapsed,
+                0.5 * self.velocity[1] + 0.5 * (viewport[1] - previous[1]) / elapsed,
+            )
+        self._viewport = viewport
+        self._schedule(viewport)
+
+    def _axis(self, first, last, count, velocity):
+        """Return the first and last rows (or cols) to have read, for a
+        viewport spanning first to last out of count, moving by velocity per
+        second."""
+        page = last - first + 1
+        ahead = int(max(page * self.lookahead, abs(velocity) * self.horizon))
+        if velocity > 0:
+            first, last = last + 1, last + ahead
+        elif velocity < 0:
+            first, last = first - ahead, first - 1
+        else:
+            first, last = first - ahead // 2, last + ahead // 2
+        return max(first, 0), min(last, count - 1)
+
+    def _col_ranges(self, left, right, cols):
+        if self.block_cols is None:
+            return [(0, cols - 1)]
+        col1, col2 = self._axis(left, right, cols, self.velocity[1])
+        col1, col2 = min(col1, left), max(col2, right)
+        size = self.block_cols
+        return [
+            (start, min(start + size, cols) - 1)
+            for start in range(col1 // size * size, col2 + 1, size)
+        ]
+
+    def _blocks(self, viewport):
+        """Return the (first_row, first_col, last_row, last_col) blocks to read,
+        nearest first."""
+        rows, cols = self.table._shape
+        top, left, bottom, right, _ = viewport
+        row1, row2 = self._axis(top, bottom, rows, self.velocity[0])
+        col_ranges = self._col_ranges(left, right, cols)
+        size = self.block_rows
+        starts = range(row1 // size * size, row2 + 1, size)
+        blocks = [
+            (start, col_first, min(start + size, rows) - 1, col_last)
+            for start in starts
+            for col_first, col_last in col_ranges
+        ]
+        middle = (top + bottom) / 2
+        blocks.sort(key=lambda block: abs(block[0] - middle))
+        return blocks
+
+    def _schedule(self, viewport):
+        cache = self.table.cell_cache
+        wanted = []
+        budget = self.max_cells
+        for block in self._blocks(viewport):
+            cells = (block[2] - block[0] + 1) * (block[3] - block[1] + 1)
+            if cells > budget:
+                break
+            budget -= cells
+            wanted.append(block)
+        wanted_set = set(wanted)
+        for block in list(self._pending):
+            if block not in wanted_set and self._pending[block][0].cancel():
+                del self._pending[block]
+                self.cancelled += 1
+        generation = cache.generation
+        for block in wanted:
+            first_row, first_col, last_row, last_col = block
+            if block in self._pending or (
+                (first_row, first_col) in cache and (last_row, last_col) in cache
+            ):
+                continue
+            future = self._executor.submit(self._read, block)
+            self._pending[block] = (future, generation)
+
+    def _read(self, block):
+        """Read and format block, on a worker thread."""
+        first_row, first_col, last_row, last_col = block
+        values = self.table.source.get_block(first_row, first_col, last_row, last_col)
+        fmt = self.table._format
+        return [
+            [fmt(col, value) for col, value in enumerate(row, first_col)]
+            for row in values
+        ]
+
+    def _collect(self):
+        cache = self.table.cell_cache
+        for block, (future, generation) in list(self._pending.items()):
+            if not future.done():
+                continue
+            del self._pending[block]
+            if future.cancelled():
+                continue
+            exc = future.exception()
+            if exc is not None:
+                logger.warning("Could not prefetch block %s", block, exc_info=exc)
+            if exc is not None or generation != cache.generation:
+                self.discarded += 1
+                continue
+            put = cache.put
+            first_row, first_col = block[0], block[1]
+            for row, values in enumerate(future.result(), first_row):
+                for col, value in enumerate(values, first_col):
+                    put((row, col), value)
+                self.cells_read += len(values)
+            self.blocks_read += 1
+
+    def stats(self):
+        """Return the counters of the prefetcher and the hits and misses of
+        the cell cache."""
+        cache = self.table.cell_cache.stats()
+        lookups = cache["hits"] + cache["misses"]
+        return {
+            "blocks_read": self.blocks_read,
+            "cells_read": self.cells_read,
+            "pending": len(self._pending),
+            "cancelled": self.cancelled,
+            "discarded": self.discarded,
+            "row_velocity": self.velocity[0],
+            "col_velocity": self.velocity[1],
+            "cache_hits": cache["hits"],
+            "cache_misses": cache["misses"],
+            "hit_ratio": cache["hits"] / lookups if lookups else None,
+        }
@@ -0,0 +1,201 @@
+# pylint: disable=missing-function-docstring, protected-access
+
+"""
+A module that contains an opt-in profiler of the Tcl calls made by tables
+and arrays, and of the callbacks they register.
+"""
+
+import json
+import time
+
+# The upper bounds, in microseconds, of the buckets of the latency histograms.
+BUCKETS = tuple(2**i for i in range(21))
+
+# The methods of tkinter.Misc that are profiled besides those of tktable.
+_MISC_METHODS = ("cget", "configure", "config")
+
+_UNPROFILED = frozenset(("batch", "enable_profiling", "disable_profiling"))
+
+# The methods of the interpreter, besides call and eval, that are counted.
+_COUNTED = frozenset(
+    ("globalgetvar", "globalsetvar", "globalunsetvar", "getvar", "setvar")
+)
+
+
+def _size(value):
+    """Return the number of characters of value once converted for Tcl."""
+    if isinstance(value, (tuple, list)):
+        return sum(_size(item) for item in value)
+    if value is None:
+        return 0
+    return len(str(value))
+
+
+def _bucket(elapsed):
+    micros = int(elapsed * 1e6)
+    return min(micros.bit_length(), len(BUCKETS) - 1)
+
+
+class MethodStats:
+    """The statistics of one profiled method or callback."""
+
+    __slots__ = ("calls", "tcl_calls", "bytes", "total_time", "max_time", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.tcl_calls = 0
+        self.bytes = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * len(BUCKETS)
+
+    def record(self, elapsed):
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.histogram[_bucket(elapsed)] += 1
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "tcl_calls": self.tcl_calls,
+            "bytes": self.bytes,
+            "total_time": self.total_time,
+            "mean_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+            "histogram": {
+                f"<={bound}us": count
+                for bound, count in zip(BUCKETS, self.histogram)
+                if count
+            },
+        }
+
+
+class Profiler:
+    """Collect, per method and per callback, the number of calls, the number
+    of Tcl round trips and of characters marshalled, and a histogram of the
+    latencies (inclusive of nested profiled calls).
+
+    A profiler can be shared by several tables and arrays, see
+    Table.enable_profiling and ArrayVar.enable_profiling. Tcl calls made
+    outside of a profiled method are counted under "(other)"."""
+
+    def __init__(self):
+        self.stats = {}
+        self._stack = []
+
+    def get_stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = MethodStats()
+        return stats
+
+    def current(self):
+        if self._stack:
+            return self._stack[-1]
+        return self.get_stats("(other)")
+
+    def reset(self):
+        self.stats = {}
+
+    def snapshot(self):
+        """Return the statistics of the methods and callbacks that were
+        called, or made Tcl calls, as a dict of dicts, which can be dumped as
+        JSON."""
+        return {
+            name: stats.as_dict()
+            for name, stats in sorted(self.stats.items())
+            if stats.calls or stats.tcl_calls
+        }
+
+    def to_json(self, **kw):
+        return json.dumps(self.snapshot(), **kw)
+
+    def wrap(self, name, func):
+        """Return a function calling func and recording it under name."""
+        stats = self.get_stats(name)
+        stack = self._stack
+        clock = time.perf_counter
+
+        def profiled(*args, **kwargs):
+            stack.append(stats)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record(clock() - start)
+                stack.pop()
+
+        profiled.__wrapped__ = func
+        return profiled
+
+
+class _ProfiledTk:
+    """A proxy of a Tcl interpreter counting the calls made through it."""
+
+    def __init__(self, tk, profiler):
+        self._tk = tk
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attr = getattr(self._tk, name)
+        if name not in _COUNTED:
+            return attr
+        profiler = self._profiler
+
+        def counted(*args):
+            stats = profiler.current()
+            stats.tcl_calls += 1
+            result = attr(*args)
+            stats.bytes += _size(args) + _size(result)
+            return result
+
+        return counted
+
+    def call(self, *args):
+        stats = self._profiler.current()
+        stats.tcl_calls += 1
+        result = self._tk.call(*args)
+        stats.bytes += _size(args) + _size(result)
+        return result
+
+    def eval(self, script):
+        stats = self._profiler.current()
+        stats.tcl_calls += 1
+        result = self._tk.eval(script)
+        stats.bytes += len(script) + _size(result)
+        return result
+
+
+def _public_methods(obj):
+    names = set(_MISC_METHODS)
+    for klass in type(obj).__mro__:
+        if not klass.__module__.startswith("tktable"):
+            continue
+        for name, value in vars(klass).items():
+            if not name.startswith("_") and callable(value) and name not in _UNPROFILED:
+                names.add(name)
+    return sorted(name for name in names if hasattr(obj, name))
+
+
+def instrument(obj, profiler, tk_attr):
+    """Profile the public methods of obj and the Tcl calls it makes through
+    its interpreter, stored in the attribute tk_attr."""
+    uninstrument(obj, tk_attr)
+    prefix = type(obj).__name__
+    for name in _public_methods(obj):
+        setattr(obj, name, profiler.wrap(f"{prefix}.{name}", getattr(obj, name)))
+    setattr(obj, tk_attr, _ProfiledTk(getattr(obj, tk_attr), profiler))
+    obj._profiler = profiler
+
+
+def uninstrument(obj, tk_attr):
+    """Undo instrument, leaving obj as fast as if it was never profiled."""
+    if obj._profiler is None:
+        return
+    for name in _public_methods(obj):
+        obj.__dict__.pop(name, None)
+    proxy = getattr(obj, tk_attr)
+    if isinstance(proxy, _ProfiledTk):
+        setattr(obj, tk_attr, proxy._tk)
+    obj._profiler = None
@@ -0,0 +1,141 @@
+# pylint: disable=missing-function-docstring
+
+"""
+A module that contains a fixed-capacity ring buffer data source and a log
+table showing its rows, newest last, while they are appended at a high rate.
+"""
+
+from tktable.virtual import DataSource, VirtualTable
+
+
+class RingBuffer(DataSource):
+    """A data source keeping the last capacity rows appended to it, in a
+    fixed list of slots: once full, each append overwrites the oldest slot,
+    so appending costs O(1) however many rows were appended before. Row 0 is
+    the oldest row kept."""
+
+    def __init__(self, capacity, cols=1):
+        if capacity < 1:
+            raise ValueError("The capacity of a RingBuffer must be positive.")
+        self.capacity = capacity
+        self.cols = cols
+        self.appended = 0
+        self._slots = [None] * capacity
+        self._start = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self):
+        return self._count == self.capacity
+
+    def append(self, row):
+        if self._count < self.capacity:
+            self._slots[(self._start + self._count) % self.capacity] = row
+            self._count += 1
+        else:
+            self._slots[self._start] = row
+            self._start = (self._start + 1) % self.capacity
+        self.appended += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+
+    def row(self, row):
+        """Return the row-th oldest row kept."""
+        if not 0 <= row < self._count:
+            raise IndexError("RingBuffer row out of range")
+        return self._slots[(self._start + row) % self.capacity]
+
+    def row_count(self):
+        return self._count
+
+    def col_count(self):
+        return self.cols
+
+    def get_cell(self, row, col):
+        values = self._slots[(self._start + row) % self.capacity]
+        return values[col] if col < len(values) else None
+
+    def get_block(self, first_row, first_col, last_row, last_col):
+        slots, start, capacity = self._slots, self._start, self.capacity
+        return [
+            list(slots[(start + row) % capacity][first_col : last_col + 1])
+            for row in range(first_row, last_row + 1)
+        ]
+
+
+class LogTable(VirtualTable):  # pylint: disable=too-many-ancestors
+    """A table showing the rows of a RingBuffer of capacity rows and cols
+    columns, newest last.
+
+    append and extend only store the rows: the table is updated at most once
+    every refresh_interval milliseconds, however many rows were appended in
+    between. While follow is true (see pause and resume), the table then
+    scrolls to show the newest row."""
+
+    def __init__(self, master=None, capacity=10000, cols=1, refresh_interval=50, **kw):
+        self.buffer = RingBuffer(capacity, cols)
+        self.refresh_interval = refresh_interval
+        self.follow = True
+        self._refresh_id = None
+        self._shown = 0
+        VirtualTable.__init__(self, master, source=self.buffer, **kw)
+
+    def append(self, row):
+        self.buffer.append(row)
+        self._schedule()
+
+    def extend(self, rows):
+        self.buffer.extend(rows)
+        self._schedule()
+
+    def pause(self):
+        """Stop scrolling to the newest row."""
+        self.follow = False
+
+    def resume(self):
+        """Scroll to the newest row, and keep doing so on each update."""
+        self.follow = True
+        self._schedule()
+
+    def clear_log(self):
+        self.buffer.clear()
+        self._shown = self.buffer.appended
+        self.refresh()
+
+    def _schedule(self):
+        if self._refresh_id is None:
+            self._refresh_id = self.after(self.refresh_interval, self.flush)
+
+    def flush(self):
+        """Show the rows appended since the last update now."""
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        buffer = self.buffer
+        new_rows = buffer.appended - self._shown
+        self._shown = buffer.appended
+        rows = len(buffer)
+        if rows != self._shape[0]:
+            self._shape = (rows, self._shape[1])
+            self.configure(rows=rows)
+        if new_rows and rows == buffer.capacity:
+            # The rows kept moved up: all the cached cells are stale.
+            self.invalidate()
+        if self.follow and rows:
+            self.see(f"{rows - 1 + self._row_origin},{self._col_origin}")
+
+    def destroy(self):
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        VirtualTable.destroy(self)
@@ -0,0 +1,132 @@
+"""
+A module that contains a scheduler which applies cell updates made by any
+thread to a table, in frames driven by the Tk event loop.
+"""
+
+import collections
+import threading
+import time
+
+
+# pylint: disable=too-many-instance-attributes
+class UpdateScheduler:
+    """Collect cell updates from any thread and apply them to table from the
+    main thread, at most max_fps times per second, each frame being one bulk
+    set call.
+
+    put and put_row only append to a deque, so they never block nor touch
+    Tk. When a frame is applied, multiple writes to the same cell are
+    coalesced, the last one winning. If max_queue is given, updates arriving
+    while that many are pending are dropped. The scheduler must be created
+    and started from the thread running the Tk mainloop."""
+
+    def __init__(self, table, max_fps=30, max_queue=None, max_cells=None):
+        self.table = table
+        self.max_fps = max_fps
+        self.max_queue = max_queue
+        self.max_cells = max_cells
+        self._queue = collections.deque()
+        self._drop_lock = threading.Lock()
+        self._after_id = None
+        self._idle_id = None
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.frames = 0
+        self.cells_applied = 0
+        self.last_frame_time = 0.0
+        self.max_frame_time = 0.0
+        self.total_frame_time = 0.0
+
+    @property
+    def queue_depth(self):
+        """The number of updates waiting to be applied."""
+        return len(self._queue)
+
+    @property
+    def running(self):
+        """Whether the queued updates are being applied."""
+        return self._after_id is not None
+
+    def put(self, row, col, value):
+        """Queue the update of a cell. Thread-safe."""
+        if self.max_queue is not None and len(self._queue) >= self.max_queue:
+            with self._drop_lock:
+                self.dropped += 1
+            return
+        self._queue.append((row, col, value))
+
+    def put_row(self, row, values, col=0):
+        """Queue the update of the cells of row starting at column col.
+        Thread-safe."""
+        if self.max_queue is not None and len(self._queue) >= self.max_queue:
+            with self._drop_lock:
+                self.dropped += len(values)
+            return
+        self._queue.extend((row, c, value) for c, value in enumerate(values, col))
+
+    def start(self):
+        """Start applying the queued updates."""
+        if self._after_id is None:
+            self._after_id = self.table.after(self._interval(), self._tick)
+
+    def stop(self):
+        """Stop applying the queued updates, which are kept."""
+        for after_id in (self._after_id, self._idle_id):
+            if after_id is not None:
+                self.table.after_cancel(after_id)
+        self._after_id = self._idle_id = None
+
+    def _interval(self):
+        return max(1, round(1000 / self.max_fps))
+
+    def _tick(self):
+        self._after_id = self.table.after(self._interval(), self._tick)
+        if self._queue and self._idle_id is None:
+            self._idle_id = self.table.after_idle(self._apply_frame)
+
+    def _apply_frame(self):
+        self._idle_id = None
+        self.flush()
+
+    def flush(self):
+        """Apply the queued updates now, in the main thread, and return the
+        number of cells that were set."""
+        start = time.perf_counter()
+        queue = self._queue
+        count = len(queue)
+        if self.max_cells is not None:
+            count = min(count, self.max_cells)
+        if not count:
+            return 0
+        pending = {}
+        popleft = queue.popleft
+        for _ in range(count):
+            row, col, value = popleft()
+            pending[f"{row:d},{col:d}"] = value
+        self.table.set(**pending)
+        elapsed = time.perf_counter() - start
+        self.received += count
+        self.coalesced += count - len(pending)
+        self.cells_applied += len(pending)
+        self.frames += 1
+        self.last_frame_time = elapsed
+        self.max_frame_time = max(self.max_frame_time, elapsed)
+        self.total_frame_time += elapsed
+        return len(pending)
+
+    def stats(self):
+        """Return a dict of counters and frame timings (in seconds)."""
+        return {
+            "queue_depth": len(self._queue),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "frames": self.frames,
+            "cells_applied": self.cells_applied,
+            "last_frame_time": self.last_frame_time,
+            "max_frame_time": self.max_frame_time,
+            "mean_frame_time": (
+                self.total_frame_time / self.frames if self.frames else 0.0
+            ),
+        }
@@ -0,0 +1,258 @@
+# pylint: disable=missing-function-docstring, too-many-instance-attributes
+
+"""
+A module that contains a search index over the cells of a table, kept up to
+date as the cells change, with the highlighting of the matches and the
+navigation between them.
+"""
+
+import bisect
+
+from tktable.array_var import _ArrayChanges
+from tktable.selection import CellRange
+from tktable.utils import _index, _parse_index
+
+EXACT = "exact"
+PREFIX = "prefix"
+SUBSTRING = "substring"
+
+# The length of the n-grams of the substring index.
+GRAM = 3
+
+
+def _grams(value):
+    return {value[i : i + GRAM] for i in range(len(value) - GRAM + 1)}
+
+
+def cell_ranges(cells):
+    """Return the sorted CellRanges covering the (row, col) cells, merging
+    the runs of consecutive cols of consecutive rows when they are equal."""
+    rows = {}
+    for row, col in sorted(cells):
+        runs = rows.setdefault(row, [])
+        if runs and runs[-1][1] == col - 1:
+            runs[-1][1] = col
+        else:
+            runs.append([col, col])
+    ranges = []
+    open_ranges = {}
+    for row, runs in rows.items():
+        current = {}
+        for first, last in runs:
+            bounds = open_ranges.pop((first, last), None)
+            if bounds is not None and bounds[1] == row - 1:
+                bounds[1] = row
+            else:
+                if bounds is not None:
+                    ranges.append(CellRange(bounds[0], first, bounds[1], last))
+                bounds = [row, row]
+            current[(first, last)] = bounds
+        for (first, last), bounds in open_ranges.items():
+            ranges.append(CellRange(bounds[0], first, bounds[1], last))
+        open_ranges = current
+    for (first, last), bounds in open_ranges.items():
+        ranges.append(CellRange(bounds[0], first, bounds[1], last))
+    return sorted(ranges)
+
+
+class SearchIndex:
+    """An index of the values of the cells of table, read from its array
+    (variable, or the one of its variable option) with a single "array get".
+
+    A trace written in Tcl records the keys of the array which are written
+    or unset, e.g. when the user edits a cell, and the index applies these
+    changes before each search, reading only the changed values. Values are
+    indexed by their exact value (casefolded unless case_sensitive is true),
+    in a sorted list of distinct values for prefix searches, and by their
+    n-grams of GRAM characters for substring searches, which only check the
+    values sharing all the n-grams of the searched text.
+
+    find highlights the matches with the tag tag (configured with
+    tag_options) in one tag call, and next and previous scroll the table to
+    them with see. Tables without an array (e.g. a VirtualTable) cannot be
+    indexed."""
+
+    def __init__(
+        self, table, variable=None, case_sensitive=False, tag="search", **tag_options
+    ):
+        self.table = table
+        name = str(variable) if variable is not None else str(table.cget("variable"))
+        if not name:
+            raise ValueError("A SearchIndex requires a table with a variable.")
+        self.variable = name
+        self.case_sensitive = case_sensitive
+        self.tag = tag
+        self.tag_options = tag_options or {"background": "yellow"}
+        self.matches = []
+        self.position = None
+        self._changes = _ArrayChanges(table.tk, name)
+        self._cells = {}
+        self._exact = {}
+        self._grams = {}
+        self._sorted = None
+        self._highlighted = []
+        self._last = None
+        self.rebuild()
+
+    def _key(self, value):
+        return value if self.case_sensitive else value.casefold()
+
+    def __len__(self):
+        """Return the number of cells indexed."""
+        return len(self._cells)
+
+    def rebuild(self):
+        """Index all the cells of the array again."""
+        tk = self.table.tk
+        self._changes.start()
+        self._cells = {}
+        self._exact = {}
+        self._grams = {}
+        self._sorted = None
+        self._last = None
+        self._update(tk.splitlist(tk.call("array", "get", self.variable)), True)
+
+    def _update(self, pairs, exists=False):
+        """Index the flat key, value pairs (or key, exists, value triples
+        if exists is false)."""
+        step = 2 if exists else 3
+        for i in range(0, len(pairs), step):
+            cell = _parse_index(str(pairs[i]))
+            if cell is None:
+                # Elements such as "active" are not cells.
+                continue
+            self._remove(cell)
+            if exists or int(pairs[i + 1]):
+                self._add(cell, str(pairs[i + step - 1]))
+
+    def _add(self, cell, value):
+        key = self._key(value)
+        self._cells[cell] = key
+        cells = self._exact.get(key)
+        if cells is None:
+            cells = self._exact[key] = set()
+            self._sorted = None
+            for gram in _grams(key):
+                self._grams.setdefault(gram, set()).add(key)
+        cells.add(cell)
+
+    def _remove(self, cell):
+        key = self._cells.pop(cell, None)
+        if key is None:
+            return
+        cells = self._exact[key]
+        cells.discard(cell)
+        if not cells:
+            del self._exact[key]
+            self._sorted = None
+            for gram in _grams(key):
+                values = self._grams[gram]
+                values.discard(key)
+                if not values:
+                    del self._grams[gram]
+
+    def sync(self):
+        """Apply the changes made to the array since the last sync, and
+        return whether there were any."""
+        pairs = self._changes.take()
+        if pairs is None:
+            self.rebuild()
+            return True
+        if pairs:
+            self._last = None
+            self._update(pairs)
+        return bool(pairs)
+
+    def _values(self, text, mode):
+        if mode == EXACT:
+            return [text] if text in self._exact else []
+        if mode == PREFIX:
+            if self._sorted is None:
+                self._sorted = sorted(self._exact)
+            values = self._sorted
+            start = bisect.bisect_left(values, text)
+            end = start
+            while end < len(values) and values[end].startswith(text):
+                end += 1
+            return values[start:end]
+        if mode != SUBSTRING:
+            raise ValueError(f"Unknown search mode: {mode!r}")
+        last = self._last
+        if last is not None and last[0] in text:
+            # Typing more characters: only the previous matches can match.
+            candidates = last[1]
+        elif len(text) >= GRAM:
+            grams = sorted(
+                (self._grams.get(gram, ()) for gram in _grams(text)), key=len
+            )
+            candidates = set(grams[0]).intersection(*grams[1:])
+        else:
+            candidates = self._exact
+        values = [value for value in candidates if text in value]
+        self._last = (text, values)
+        return values
+
+    def search(self, text, mode=SUBSTRING):
+        """Return the sorted (row, col) cells whose value matches text: is
+        equal to it, starts with it or contains it, depending on mode (EXACT,
+        PREFIX or SUBSTRING)."""
+        self.sync()
+        text = self._key(text)
+        if not text:
+            return []
+        cells = []
+        for value in self._values(text, mode):
+            cells.extend(self._exact[value])
+        cells.sort()
+        return cells
+
+    def find(self, text, mode=SUBSTRING, highlight=True):
+        """Search text, make the matches the ones visited by next and
+        previous, highlight them if highlight is true, and return them as
+        CellRanges."""
+        self.matches = self.search(text, mode)
+        self.position = None
+        if highlight:
+            self.highlight(self.matches)
+        return cell_ranges(self.matches)
+
+    def highlight(self, cells):
+        """Tag the cells with tag, instead of the previous ones. Since a
+        cell has a single cell tag, this replaces their other cell tags."""
+        table = self.table
+        if self._highlighted:
+            table.tag_cell("", *self._highlighted)
+        self._highlighted = [_index(row, col) for row, col in cells]
+        if self._highlighted:
+            table.tag_configure(self.tag, **self.tag_options)
+            table.tag_cell(self.tag, *self._highlighted)
+
+    def clear(self):
+        """Forget the matches and remove their highlighting."""
+        self.matches = []
+        self.position = None
+        self.highlight(())
+
+    def next(self):
+        """Scroll to the next match (the first one after the last match)
+        and return it, or None if there are no matches."""
+        return self._move(1)
+
+    def previous(self):
+        return self._move(-1)
+
+    def _move(self, step):
+        if not self.matches:
+            return None
+        if self.position is None:
+            self.position = 0 if step > 0 else len(self.matches) - 1
+        else:
+            self.position = (self.position + step) % len(self.matches)
+        cell = self.matches[self.position]
+        self.table.see(_index(*cell))
+        return cell
+
+    def close(self):
+        """Remove the trace of the array and the highlighting."""
+        self._changes.stop()
+        self.clear()
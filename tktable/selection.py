@@ -0,0 +1,172 @@
+# pylint: disable=missing-function-docstring, protected-access
+
+"""
+A module that contains the selection of a table as a list of rectangular
+ranges, and its export to TSV, CSV and the clipboard.
+"""
+
+import collections
+import csv
+import io
+
+from tktable.utils import CHUNK_SIZE
+
+# A Tcl lambda compressing the (sorted) selection of a table into rectangles,
+# returned as a flat list of first row, first col, last row and last col. The
+# runs of consecutive cols of each row are merged with those of the previous
+# rows when they are the same.
+_SELECTION_RANGES = """{w} {
+    set pairs [split [join [$w curselection] ,] ,]
+    lappend pairs end {}
+    set rects {}
+    set runs {}
+    set group {}
+    set prev_row {}
+    set prev_col {}
+    set start {}
+    set end 0
+    foreach {row col} $pairs {
+        if {$row eq $prev_row} {
+            if {$col == $prev_col + 1} {
+                lset runs end $col
+            } else {
+                lappend runs $col $col
+            }
+            set prev_col $col
+            continue
+        }
+        if {$runs ne $group || $prev_row != $end + 1} {
+            foreach {first last} $group {
+                lappend rects $start $first $end $last
+            }
+            set group $runs
+            set start $prev_row
+        }
+        set end $prev_row
+        set runs [list $col $col]
+        set prev_row $row
+        set prev_col $col
+    }
+    foreach {first last} $group {
+        lappend rects $start $first $end $last
+    }
+    return $rects
+}"""
+
+
+class CellRange(collections.namedtuple("CellRange", "row1 col1 row2 col2")):
+    """A rectangular range of cells, all bounds inclusive."""
+
+    __slots__ = ()
+
+    @property
+    def size(self):
+        return (self.row2 - self.row1 + 1) * (self.col2 - self.col1 + 1)
+
+    def __contains__(self, cell):
+        row, col = cell
+        return self.row1 <= row <= self.row2 and self.col1 <= col <= self.col2
+
+    def cells(self):
+        for row in range(self.row1, self.row2 + 1):
+            for col in range(self.col1, self.col2 + 1):
+                yield row, col
+
+
+def selection_ranges(table):
+    """Return the selection of table as a list of disjoint CellRange, in the
+    order of their first cell. The selection is compressed by Tcl, so that
+    no string is made per selected cell on the Python side."""
+    tk = table.tk
+    values = tk.splitlist(tk.call("apply", _SELECTION_RANGES, table._w))
+    values = [int(value) for value in values]
+    return sorted(CellRange(*values[i : i + 4]) for i in range(0, len(values), 4))
+
+
+class Selection:
+    """The selection of table when created (see refresh), which can be
+    iterated over lazily and exported with a read per range."""
+
+    def __init__(self, table):
+        self.table = table
+        self.ranges = selection_ranges(table)
+
+    def refresh(self):
+        self.ranges = selection_ranges(self.table)
+
+    def __len__(self):
+        return sum(cell_range.size for cell_range in self.ranges)
+
+    def __bool__(self):
+        return bool(self.ranges)
+
+    def __iter__(self):
+        """Yield the (row, col) tuples of the selected cells, range by range."""
+        for cell_range in self.ranges:
+            yield from cell_range.cells()
+
+    def __contains__(self, cell):
+        return any(cell in cell_range for cell_range in self.ranges)
+
+    def bounds(self):
+        """Return the smallest CellRange containing the selection, or None."""
+        if not self.ranges:
+            return None
+        return CellRange(
+            min(cell_range.row1 for cell_range in self.ranges),
+            min(cell_range.col1 for cell_range in self.ranges),
+            max(cell_range.row2 for cell_range in self.ranges),
+            max(cell_range.col2 for cell_range in self.ranges),
+        )
+
+    def iter_rows(self, chunk_size=CHUNK_SIZE):
+        """Yield the selected rows as lists of values, spanning the columns
+        of the bounds of the selection. Cells outside of the selection are
+        empty, and rows without selected cells are skipped. Each range is
+        read by chunks of about chunk_size cells."""
+        bounds = self.bounds()
+        if bounds is None:
+            return
+        if len(self.ranges) == 1:
+            yield from self._read(bounds, chunk_size)
+            return
+        width = bounds.col2 - bounds.col1 + 1
+        rows = {}
+        for cell_range in self.ranges:
+            for row, values in enumerate(
+                self._read(cell_range, chunk_size), cell_range.row1
+            ):
+                line = rows.get(row)
+                if line is None:
+                    line = rows[row] = [""] * width
+                start = cell_range.col1 - bounds.col1
+                line[start : start + len(values)] = values
+        for row in sorted(rows):
+            yield rows[row]
+
+    def _read(self, cell_range, chunk_size):
+        width = cell_range.col2 - cell_range.col1 + 1
+        step = max(chunk_size // width, 1)
+        for row in range(cell_range.row1, cell_range.row2 + 1, step):
+            last = min(row + step - 1, cell_range.row2)
+            yield from self.table.read_region(
+                (row, cell_range.col1), (last, cell_range.col2)
+            )
+
+    def to_text(self, fmt="tsv"):
+        """Return the selection as TSV (fmt="tsv") or CSV (fmt="csv") text."""
+        if fmt == "tsv":
+            return "\n".join("\t".join(values) for values in self.iter_rows())
+        if fmt != "csv":
+            raise ValueError(f"Unknown format {fmt!r}: use tsv or csv")
+        output = io.StringIO()
+        csv.writer(output, lineterminator="\n").writerows(self.iter_rows())
+        return output.getvalue()
+
+    def copy(self, fmt="tsv"):
+        """Copy the selection to the clipboard, as TSV by default, and return
+        the number of cells copied."""
+        text = self.to_text(fmt)
+        self.table.clipboard_clear()
+        self.table.clipboard_append(text)
+        return len(self)
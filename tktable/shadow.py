@@ -0,0 +1,111 @@
+"""
+A module that contains a Python copy of the cells of a table, which is used
+to write only the cells that changed.
+"""
+
+from tktable.utils import numpy
+
+
+class ShadowModel:
+    """Keep a copy of the values last written to a table (through its
+    ArrayVar, if variable is given), so that update_from sends only the
+    cells whose value changed.
+
+    The copy is a 2D NumPy array of strings when NumPy is installed, and a
+    list of lists of strings otherwise. Values are compared after being
+    converted with str. If flash is true, the flashmode option of the table
+    is turned on, so that the changed cells flash."""
+
+    def __init__(self, table, variable=None, row_origin=0, col_origin=0, flash=False):
+        self.table = table
+        self.variable = variable
+        self.row_origin = row_origin
+        self.col_origin = col_origin
+        self._shadow = None
+        if flash:
+            table.configure(flashmode="on")
+
+    @property
+    def shape(self):
+        """The (rows, cols) of the last grid given to update_from."""
+        shadow = self._shadow
+        if shadow is None:
+            return (0, 0)
+        if numpy is not None and isinstance(shadow, numpy.ndarray):
+            return shadow.shape
+        return (len(shadow), max((len(row) for row in shadow), default=0))
+
+    def reset(self):
+        """Forget the copy, so that the next update writes every cell."""
+        self._shadow = None
+
+    def _diff_array(self, grid):
+        if isinstance(grid, numpy.ndarray):
+            new = grid
+        else:
+            # Converting the cells one by one, as _diff_lists does: an array
+            # of mixed ints and floats would turn 1 into "1.0".
+            new = numpy.array([[str(value) for value in row] for row in grid])
+        if new.ndim != 2:
+            raise ValueError(f"Expected a 2D grid, but got a {new.ndim}D one.")
+        new = new.astype(str)
+        old = self._shadow
+        if isinstance(old, numpy.ndarray) and old.shape == new.shape:
+            rows, cols = numpy.nonzero(new != old)
+        else:
+            rows, cols = numpy.indices(new.shape).reshape(2, -1)
+        values = new[rows, cols].tolist()
+        self._shadow = new
+        return (
+            (rows + self.row_origin).tolist(),
+            (cols + self.col_origin).tolist(),
+            values,
+        )
+
+    def _diff_lists(self, grid):
+        new = [[str(value) for value in row] for row in grid]
+        old = self._shadow
+        if old is None:
+            old = []
+        elif not isinstance(old, list):
+            old = old.tolist()
+        rows, cols, values = [], [], []
+        for row, (new_row, old_row) in enumerate(zip(new, old)):
+            for col, value in enumerate(new_row):
+                if col >= len(old_row) or old_row[col] != value:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append(value)
+        for row in range(len(old), len(new)):
+            rows.extend([row] * len(new[row]))
+            cols.extend(range(len(new[row])))
+            values.extend(new[row])
+        self._shadow = new
+        row_origin, col_origin = self.row_origin, self.col_origin
+        return [r + row_origin for r in rows], [c + col_origin for c in cols], values
+
+    def diff(self, grid):
+        """Update the copy with grid (a list of lists or a 2D NumPy array) and
+        return the changed cells as a dict of "row,col" indices to values,
+        without writing them."""
+        if numpy is not None:
+            try:
+                rows, cols, values = self._diff_array(grid)
+            except ValueError:
+                # A ragged list of lists cannot be compared as an array.
+                rows, cols, values = self._diff_lists(grid)
+        else:
+            rows, cols, values = self._diff_lists(grid)
+        return {f"{r:d},{c:d}": value for r, c, value in zip(rows, cols, values)}
+
+    def update_from(self, grid):
+        """Write the cells of grid (a list of lists or a 2D NumPy array) that
+        differ from the previous grid with a single call, and return how many
+        were written. Cells outside of grid are left untouched."""
+        dirty = self.diff(grid)
+        if dirty:
+            if self.variable is not None:
+                self.variable.update(dirty)
+            else:
+                self.table.set(**dirty)
+        return len(dirty)
@@ -0,0 +1,191 @@
+# pylint: disable=missing-function-docstring, protected-access, too-few-public-methods
+
+"""
+A module that contains the writing and reading of snapshots of the state of
+a table (data, tags, sizes, spans and view) in a compact binary format.
+
+A snapshot starts with MAGIC, followed by the length of a UTF-8 JSON header
+as a little-endian unsigned 32-bit int, the header itself and the sections
+it describes: the values of each column, and the cells of each tag, stored
+as Tcl lists so that Tcl can parse them without Python building a string
+per cell. Snapshots are read through mmap.
+"""
+
+import json
+import mmap
+import struct
+
+MAGIC = b"TKTSNAP1"
+
+_LENGTH = struct.Struct("<I")
+
+# The tags managed by the table itself, whose cells are not saved.
+_BUILTIN_TAGS = frozenset(("active", "sel", "title", "flash"))
+
+_OPTIONS = ("rows", "cols", "roworigin", "colorigin", "titlerows", "titlecols")
+
+# A Tcl lambda calling a command and returning its result as a string, so
+# that tkinter does not split lists into tuples.
+_AS_STRING = "{args} {string range [{*}$args] 0 end}"
+
+# A Tcl lambda replacing the content of the array of a table by the values
+# of the given columns (Tcl lists), skipping the empty ones. The array is
+# detached from the table while it is filled, so that no trace fires.
+_RESTORE_DATA = """{w first_row first_col args} {
+    set var [$w cget -variable]
+    $w configure -variable {}
+    upvar #0 $var cells
+    array unset cells
+    set col $first_col
+    foreach values $args {
+        set row $first_row
+        foreach value $values {
+            if {$value ne ""} {
+                set cells($row,$col) $value
+            }
+            incr row
+        }
+        incr col
+    }
+    $w configure -variable $var
+}"""
+
+# A Tcl lambda tagging the cells of a Tcl list.
+_TAG_CELLS = "{w tag cells} {$w tag cell $tag {*}$cells}"
+
+
+def _as_string(table, *args):
+    return table.tk.call("apply", _AS_STRING, table._w, *args)
+
+
+def _tag_options(table, tag):
+    options = {}
+    for option, description in table.tag_configure(tag).items():
+        default, value = description[-2:]
+        if str(value) != str(default):
+            options[option.lstrip("-")] = str(value)
+    return options
+
+
+def _sizes(pairs):
+    return {str(key): int(value) for key, value in pairs.items()}
+
+
+class _Writer:
+    def __init__(self):
+        self.sections = []
+        self.size = 0
+
+    def add(self, text):
+        data = text.encode("utf-8")
+        self.sections.append(data)
+        self.size += len(data)
+        return [self.size - len(data), len(data)]
+
+
+def _save_columns(table, options, writer):
+    if not str(table.cget("variable")):
+        return []
+    first_row, first_col = options["roworigin"], options["colorigin"]
+    last_row = first_row + options["rows"] - 1
+    return [
+        writer.add(_as_string(table, "get", f"{first_row},{col}", f"{last_row},{col}"))
+        for col in range(first_col, first_col + options["cols"])
+    ]
+
+
+def _save_tags(table, writer):
+    splitlist = table.tk.splitlist
+    tags = {}
+    for tag in map(str, splitlist(table.tag_names())):
+        saved = tags[tag] = {"options": _tag_options(table, tag)}
+        if tag not in _BUILTIN_TAGS:
+            saved["cells"] = writer.add(_as_string(table, "tag", "cell", tag))
+            saved["rows"] = [int(row) for row in splitlist(table.tag_row(tag))]
+            saved["cols"] = [int(col) for col in splitlist(table.tag_col(tag))]
+    return tags
+
+
+def snapshot(table, path):
+    """Write the state of table to the file at path and return the number of
+    bytes written. The data is only saved if the table has an associated
+    array (see the variable option), and the view is its top left cell."""
+    options = {name: int(table.cget(name)) for name in _OPTIONS}
+    writer = _Writer()
+    header = {
+        "options": options,
+        "columns": _save_columns(table, options, writer),
+        "tags": _save_tags(table, writer),
+        "widths": _sizes(table.width()),
+        "heights": _sizes(table.height()),
+        "spans": list(map(str, table.tk.splitlist(table.spans()))),
+        "topleft": str(table.index("topleft")),
+    }
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(_LENGTH.pack(len(encoded)))
+        file.write(encoded)
+        for section in writer.sections:
+            file.write(section)
+    return len(MAGIC) + _LENGTH.size + len(encoded) + writer.size
+
+
+def _read_header(data):
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a table snapshot.")
+    start = len(MAGIC) + _LENGTH.size
+    (length,) = _LENGTH.unpack(data[len(MAGIC) : start])
+    header = json.loads(bytes(data[start : start + length]).decode("utf-8"))
+    return header, start + length
+
+
+def restore(table, path):
+    """Restore the state of table written by snapshot to the file at path.
+    The data replaces the content of the array of the table, if it has one,
+    and the tags of the snapshot are configured again (other tags are kept)."""
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        header, base = _read_header(data)
+
+        def section(offset_length):
+            offset, length = offset_length
+            return data[base + offset : base + offset + length].decode("utf-8")
+
+        _restore(table, header, section)
+
+
+def _restore(table, header, section):
+    tk = table.tk
+    options = header["options"]
+    table.configure(**options)
+    if header["columns"] and str(table.cget("variable")):
+        tk.call(
+            "apply",
+            _RESTORE_DATA,
+            table._w,
+            options["roworigin"],
+            options["colorigin"],
+            *map(section, header["columns"]),
+        )
+    for tag, saved in header["tags"].items():
+        if saved["options"]:
+            table.tag_configure(tag, **saved["options"])
+        if "cells" in saved:
+            cells = section(saved["cells"])
+            if cells:
+                tk.call("apply", _TAG_CELLS, table._w, tag, cells)
+            if saved["rows"]:
+                table.tag_row(tag, *saved["rows"])
+            if saved["cols"]:
+                table.tag_col(tag, *saved["cols"])
+    if header["widths"]:
+        table.width(**header["widths"])
+    if header["heights"]:
+        table.height(**header["heights"])
+    if header["spans"]:
+        tk.call(table._w, "spans", *header["spans"])
+    row, col = header["topleft"].split(",")
+    tk.call(table._w, "yview", row)
+    tk.call(table._w, "xview", col)
@@ -0,0 +1,111 @@
+# pylint: disable=missing-function-docstring
+
+"""
+A module that contains the computation of the spans of grouped layouts from
+runs of equal values, and a manager applying them to a table in bulk.
+"""
+
+from tktable.utils import _index, _parse_index
+
+
+def span_map(table):
+    """Return the spans of table as a dict mapping each (row, col) spanning
+    cell to its span, a (rows, cols) tuple of the extra rows and columns it
+    covers, read with a single spans call."""
+    values = table.tk.splitlist(table.spans())
+    return {
+        _parse_index(values[i]): _parse_index(values[i + 1])
+        for i in range(0, len(values) - 1, 2)
+    }
+
+
+def hidden_cells(table):
+    """Return the set of the (row, col) tuples of the cells of table hidden
+    by a spanning cell."""
+    return {_parse_index(index) for index in table.tk.splitlist(table.hidden())}
+
+
+def covered(spans):
+    """Yield the (row, col) tuples of the cells hidden by the spans of the
+    given span map, as computed from it (without asking the table)."""
+    for (row, col), (rows, cols) in spans.items():
+        for hidden_row in range(row, row + rows + 1):
+            for hidden_col in range(col, col + cols + 1):
+                if hidden_row != row or hidden_col != col:
+                    yield hidden_row, hidden_col
+
+
+def run_lengths(values, boundaries=()):
+    """Return the (start, length) runs of equal consecutive values, which
+    also break at the positions in boundaries."""
+    runs = []
+    start = 0
+    previous = object()
+    for position, value in enumerate(values):
+        if value != previous or position in boundaries:
+            if position:
+                runs.append((start, position - start))
+            start = position
+            previous = value
+    if values:
+        runs.append((start, len(values) - start))
+    return runs
+
+
+def grouped_spans(columns, first_row=0, nested=True):
+    """Return the span map merging the runs of equal values of key columns.
+
+    columns maps the table column of each key column to its values, for the
+    rows starting at first_row, outermost key first. If nested is true, the
+    runs of a column also break where those of the previous columns do, as
+    in a grouped report."""
+    spans = {}
+    boundaries = set()
+    for col, values in columns.items():
+        values = list(values)
+        runs = run_lengths(values, boundaries if nested else ())
+        for start, length in runs:
+            if length > 1:
+                spans[(first_row + start, col)] = (length - 1, 0)
+        if nested:
+            boundaries.update(start for start, _ in runs)
+    return spans
+
+
+class SpanManager:
+    """Apply span maps to table, sending only the differences with the spans
+    it applied before (or found on the table when created) in one spans
+    call."""
+
+    def __init__(self, table):
+        self.table = table
+        self.spans = span_map(table)
+
+    def refresh(self):
+        """Read the current spans of the table again."""
+        self.spans = span_map(self.table)
+
+    def diff(self, spans):
+        """Return the "row,col": "rows,cols" pairs turning the current spans
+        into spans, where "0,0" removes a span."""
+        pairs = {_index(*cell): "0,0" for cell in self.spans.keys() - spans.keys()}
+        for cell, span in spans.items():
+            if self.spans.get(cell) != span:
+                pairs[_index(*cell)] = _index(*span)
+        return pairs
+
+    def apply(self, spans):
+        """Make spans (a span map) the spans of the table and return the
+        number of cells changed."""
+        pairs = self.diff(spans)
+        if pairs:
+            self.table.spans(**pairs)
+        self.spans = dict(spans)
+        return len(pairs)
+
+    def group(self, columns, first_row=0, nested=True):
+        """Apply the spans of grouped_spans(columns, first_row, nested)."""
+        return self.apply(grouped_spans(columns, first_row, nested))
+
+    def clear(self):
+        return self.apply({})
@@ -0,0 +1,239 @@
+# pylint: disable=too-many-instance-attributes, too-many-arguments
+
+"""
+A module that contains a loader which streams CSV, TSV and JSONL files into
+a table, chunk by chunk, while the Tk event loop keeps running.
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+
+_FORMATS = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".tab": "tsv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+def _counted_lines(stream, counter, encoding):
+    for line in stream:
+        counter[0] += len(line)
+        yield line.decode(encoding)
+
+
+def iter_records(stream, fmt, counter, encoding="utf-8"):
+    """Yield the rows (lists of values) read from the binary stream, which
+    holds data in the format fmt ("csv", "tsv" or "jsonl"). counter[0] is
+    increased by the number of bytes read.
+
+    The values of JSONL objects are placed in the order of their keys, as
+    first seen: a key which first appears in a later object gets a new
+    column, after the previous ones, and the missing values are None (as are
+    the JSON nulls), which a table shows as empty cells."""
+    lines = _counted_lines(stream, counter, encoding)
+    if fmt in ("csv", "tsv"):
+        yield from csv.reader(lines, delimiter="," if fmt == "csv" else "\t")
+        return
+    if fmt != "jsonl":
+        raise ValueError(f"Unknown format {fmt!r}: use csv, tsv or jsonl")
+    keys = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if isinstance(record, dict):
+            for key in record:
+                keys.setdefault(key, len(keys))
+            row = [None] * len(keys)
+            for key, value in record.items():
+                row[keys[key]] = value
+            yield row
+        elif isinstance(record, list):
+            yield record
+        else:
+            yield [record]
+
+
+def iter_chunks(rows, chunk_rows):
+    """Group an iterable of rows into lists of at most chunk_rows rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class StreamLoader:
+    """Load the file at path into table, one chunk of chunk_rows rows at a
+    time, growing the rows (and cols) of the table as needed.
+
+    The file is parsed on a background thread if threaded is true, and
+    between Tk events otherwise. Each chunk is written by the Tk thread with
+    a single bulk write, so the first rows are shown as soon as they are
+    read. fmt is "csv", "tsv" or "jsonl" and is guessed from the extension of
+    path if not given. progress, if given, is called after each chunk with
+    the number of rows loaded, the number of bytes read and the size of the
+    file. on_done, if given, is called with the loader once it finished,
+    failed (see error) or was cancelled. The table must have an associated
+    array."""
+
+    def __init__(
+        self,
+        table,
+        path,
+        fmt=None,
+        *,
+        chunk_rows=2000,
+        threaded=True,
+        row_origin=0,
+        col_origin=0,
+        progress=None,
+        on_done=None,
+        encoding="utf-8",
+        poll_interval=10,
+    ):
+        if fmt is None:
+            fmt = _FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+        self.table = table
+        self.path = path
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.threaded = threaded
+        self.row_origin = row_origin
+        self.col_origin = col_origin
+        self.progress = progress
+        self.on_done = on_done
+        self.encoding = encoding
+        self.poll_interval = poll_interval
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self.rows_loaded = 0
+        self.error = None
+        self.done = False
+        self._counter = [0]
+        self._cancelled = threading.Event()
+        self._chunks = None
+        self._queue = None
+        self._after_id = None
+        self._rows = 0
+        self._cols = 0
+        self._table_origin = (0, 0)
+
+    @property
+    def cancelled(self):
+        """Whether cancel was called."""
+        return self._cancelled.is_set()
+
+    def _read_chunks(self):
+        with open(self.path, "rb") as stream:
+            records = iter_records(stream, self.fmt, self._counter, self.encoding)
+            for chunk in iter_chunks(records, self.chunk_rows):
+                if self._cancelled.is_set():
+                    return
+                yield chunk, self._counter[0]
+
+    def _put(self, item):
+        # The queue is bounded, so that parsing does not outrun the display.
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        try:
+            for item in self._read_chunks():
+                if not self._put(item):
+                    return
+        except Exception as exc:  # pylint: disable=broad-except
+            self._put(exc)
+            return
+        self._put(None)
+
+    def start(self):
+        """Start loading and return the loader, which serves as the handle to
+        cancel it."""
+        table = self.table
+        self._rows = int(table.cget("rows"))
+        self._cols = int(table.cget("cols"))
+        self._table_origin = (
+            int(table.cget("roworigin")),
+            int(table.cget("colorigin")),
+        )
+        if self.threaded:
+            self._queue = queue.Queue(maxsize=4)
+            threading.Thread(target=self._produce, daemon=True).start()
+        else:
+            self._chunks = self._read_chunks()
+        self._after_id = self.table.after_idle(self._step)
+        return self
+
+    def cancel(self):
+        """Stop loading. The rows already loaded are kept."""
+        self._cancelled.set()
+        if self._after_id is not None:
+            self.table.after_cancel(self._after_id)
+            self._after_id = None
+        self._finish()
+
+    def _finish(self):
+        if not self.done:
+            self.done = True
+            if self.on_done is not None:
+                self.on_done(self)
+
+    def _next_item(self):
+        """Return the next (chunk, bytes read) pair, an exception, None when
+        the file is exhausted, or False if no chunk is ready yet."""
+        if self._queue is None:
+            try:
+                return next(self._chunks)
+            except StopIteration:
+                return None
+            except Exception as exc:  # pylint: disable=broad-except
+                return exc
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return False
+
+    def _step(self):
+        self._after_id = None
+        if self._cancelled.is_set():
+            return
+        item = self._next_item()
+        if item is None or isinstance(item, Exception):
+            self.error = item
+            self._finish()
+            return
+        if item is not False:
+            self._apply(*item)
+        delay = self.poll_interval if item is False else 1
+        self._after_id = self.table.after(delay, self._step)
+
+    def _apply(self, chunk, bytes_read):
+        first_row = self.row_origin + self.rows_loaded
+        rows = first_row + len(chunk) - self._table_origin[0]
+        cols = self.col_origin + max(len(row) for row in chunk) - self._table_origin[1]
+        options = {}
+        if rows > self._rows:
+            options["rows"] = self._rows = rows
+        if cols > self._cols:
+            options["cols"] = self._cols = cols
+        if options:
+            self.table.configure(**options)
+        self.table.load(chunk, first_row, self.col_origin)
+        self.rows_loaded += len(chunk)
+        self.bytes_read = bytes_read
+        if self.progress is not None:
+            self.progress(self.rows_loaded, bytes_read, self.total_bytes)
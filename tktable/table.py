@@ -5,13 +5,25 @@
 A module that contains a Python wrapper class for the Tcl/tk tktable widget.
 """
 
-
-import collections
+import contextlib
 import logging
 import os
 import tkinter
-
-from tktable.utils import _setup_master
+import weakref
+
+from tktable import profiling, snapshot
+from tktable.batch import Batch
+from tktable.callbacks import CallbackRegistry, RawCallback
+from tktable.option_cache import OptionCache
+from tktable.selection import selection_ranges
+from tktable.utils import (
+    CHUNK_SIZE,
+    _grid_chunks,
+    _index,
+    _parse_index,
+    _require_numpy,
+    _setup_master,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +37,66 @@ class CannotUseError(RuntimeError):
     """
 
 
+# The result of loading tktable, i.e. its version or the TclError raised, per
+# Tk root (and thus per Tcl interpreter).
+_packages = weakref.WeakKeyDictionary()
+
+
+def _cannot_use_error(name):
+    return CannotUseError(
+        f"You cannot use {name} "
+        f"unless you have installed in your system the following tools:\n"
+        "1. Tcl (a programming language: https://www.tcl-lang.org/)\n"
+        "2. Tk (a Tcl package to create and manipulate GUI widgets)\n"
+        "3. Tkinter (a Python interface to Tk: "
+        "https://docs.python.org/3/library/tkinter.html), "
+        "which is installed.\n"
+        "4. The original Tk widget: tktable,\n"
+        "which you may be able to install using the instructions here:\n"
+        "https://github.com/nbro/tktable/issues/1#issuecomment-244519589."
+    )
+
+
+def _load_package(tk):
+    env_var = os.environ.get("TKTABLE_LIBRARY")
+    if env_var:
+        if env_var not in tk.splitlist(tk.getvar("auto_path")):
+            logger.info("Add %s to auto_path", env_var)
+            tk.call("lappend", "auto_path", env_var)
+    else:
+        logger.info("The environment variable TKTABLE_LIBRARY is not defined.")
+
+    logger.info("Require the Tcl/Tk widget: tktable.")
+    # https://wiki.tcl-lang.org/page/package+require
+    return str(tk.call("package", "require", "Tktable"))
+
+
+def preload(master=None):
+    """Load tktable in the Tcl interpreter of master (or of the default root),
+    if not done yet, and return its version. Tables call it when they are
+    created, so call it at startup to not pay for it when the first table is
+    shown.
+
+    The result is cached per interpreter, including failures: CannotUseError
+    is raised again without retrying, and TKTABLE_LIBRARY is only read the
+    first time."""
+    return _require(_setup_master(master), "tktable")
+
+
+def _require(master, name):
+    root = master._root()
+    result = _packages.get(root)
+    if result is None:
+        try:
+            result = _load_package(root.tk)
+        except tkinter.TclError as exc:
+            result = exc
+        _packages[root] = result
+    if isinstance(result, tkinter.TclError):
+        raise _cannot_use_error(name) from result
+    return result
+
+
 # pylint: disable=too-many-public-methods
 class Table(tkinter.Widget):
     """Create and manipulate tables."""
@@ -47,37 +119,18 @@ class Table(tkinter.Widget):
         "validatecommand",
         "valcmd",
     )
+    _batch = None
+    _profiler = None
+    _callback_registry = None
+    _option_cache = None
 
     def __init__(self, master=None, **kw):
         master = _setup_master(master)
-
-        env_var = os.environ.get("TKTABLE_LIBRARY")
-        if env_var:
-            logger.info("Add %s to auto_path", env_var)
-            master.tk.eval(f"global auto_path; lappend auto_path {{{env_var}}}")
-        else:
-            logger.info("The environment variable TKTABLE_LIBRARY is not defined.")
-
+        _require(master, self.__class__.__name__)
         try:
-            logger.info("Require the Tcl/Tk widget: tktable.")
-
-            # https://wiki.tcl-lang.org/page/package+require
-            master.tk.call("package", "require", "Tktable")
-
             tkinter.Widget.__init__(self, master, "table", kw)
         except tkinter.TclError as exc:
-            raise CannotUseError(
-                f"You cannot instantiate {self.__class__.__name__} "
-                f"unless you have installed in your system the following tools:\n"
-                "1. Tcl (a programming language: https://www.tcl-lang.org/)\n"
-                "2. Tk (a Tcl package to create and manipulate GUI widgets)\n"
-                "3. Tkinter (a Python interface to Tk: "
-                "https://docs.python.org/3/library/tkinter.html), "
-                "which is installed.\n"
-                "4. The original Tk widget: tktable,\n"
-                "which you may be able to install using the instructions here:\n"
-                "https://github.com/nbro/tktable/issues/1#issuecomment-244519589."
-            ) from exc
+            raise _cannot_use_error(self.__class__.__name__) from exc
 
     def _options(self, cnf, kw=None):
         if kw:
@@ -86,14 +139,58 @@ class Table(tkinter.Widget):
             cnf = tkinter._cnfmerge(cnf)
         res = ()
         for k, v in cnf.items():
-            if isinstance(v, collections.Callable):
+            if isinstance(v, RawCallback):
+                if k not in self._tabsubst_commands:
+                    raise ValueError(f"The option {k!r} does not take a RawCallback")
+                func = v.func
+                if self._profiler is not None:
+                    func = self._profiler.wrap(f"callback.{k}", func)
+                name = self._callbacks.register(
+                    k, func, v.subst(self), ("raw", v.fields, v.event)
+                )
+                v = f"{name} {v.format}"
+            elif callable(v):
+                if self._profiler is not None:
+                    v = self._profiler.wrap(f"callback.{k}", v)
                 if k in self._tabsubst_commands:
-                    v = f"{self._register(v, self._tabsubst)} {' '.join(self._tabsubst_format)}"
+                    name = self._callbacks.register(k, v, self._tabsubst, "tabsubst")
+                    v = f"{name} {' '.join(self._tabsubst_format)}"
                 else:
-                    v = self._register(v)
+                    v = self._callbacks.register(k, v)
+            elif self._callback_registry is not None:
+                self._callback_registry.release(k)
             res += (f"-{k}", v)
         return res
 
+    @property
+    def _callbacks(self):
+        # Created on demand, since _options is called by Widget.__init__.
+        if self._callback_registry is None:
+            self._callback_registry = CallbackRegistry(self)
+        return self._callback_registry
+
+    @property
+    def option_cache(self):
+        """The OptionCache of the table, created when first used: typed,
+        cached reads of its dimensions, origins, title rows and cols, active
+        and anchor cells and tag options."""
+        if self._option_cache is None:
+            self._option_cache = OptionCache(self)
+        return self._option_cache
+
+    def destroy(self):
+        if self._option_cache is not None:
+            self._option_cache.close()
+            self._option_cache = None
+        tkinter.Widget.destroy(self)
+
+    def configure(self, cnf=None, **kw):
+        if self._option_cache is not None and (kw or isinstance(cnf, dict)):
+            self._option_cache.options_changed()
+        return tkinter.Widget.configure(self, cnf, **kw)
+
+    config = configure
+
     def _tabsubst(self, *args):
         if len(args) != len(self._tabsubst_format):
             return args
@@ -113,6 +210,15 @@ class Table(tkinter.Widget):
             e.W = None
         return (e,)
 
+    def _coords(self, index):
+        """Return the (row, col) tuple of ints for index, which can also be a
+        (row, col) tuple. Indices that are not of the form "row,col" (e.g.
+        "active" or "@x,y") are resolved by the table."""
+        coords = _parse_index(index)
+        if coords is None:
+            coords = _parse_index(self.index(index))
+        return coords
+
     def _handle_switches(self, args):
         args = args or ()
         return tuple(f"-{x}" for x in args if x in self._switches)
@@ -120,6 +226,43 @@ class Table(tkinter.Widget):
     def activate(self, index):
         """Set the active cell to the one indicated by index."""
         self.tk.call(self._w, "activate", index)
+        if self._option_cache is not None:
+            self._option_cache.cells_changed()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Return a context manager which queues the set, load, tag_cell,
+        width, height and spans operations made inside the with block and,
+        when it exits, sends them as one Tcl script, merging the operations
+        of the same kind into a single command. Since no event is processed
+        in between, the table is redrawn once.
+
+        Nothing is sent if the block raises an exception. Nested batches join
+        the outermost one. Reads made inside the block do not see the queued
+        operations."""
+        if self._batch is not None:
+            yield self._batch
+            return
+        batch = self._batch = Batch(self)
+        try:
+            yield batch
+        finally:
+            self._batch = None
+        batch.flush()
+
+    def enable_profiling(self, profiler=None):
+        """Profile the public methods of the table, the Tcl calls they make
+        and the callbacks configured from now on, and return the profiler
+        (a new profiling.Profiler if none is given). See disable_profiling."""
+        if profiler is None:
+            profiler = profiling.Profiler()
+        profiling.instrument(self, profiler, "tk")
+        return profiler
+
+    def disable_profiling(self):
+        """Stop profiling the table. The callbacks configured while it was
+        profiled stay profiled until they are configured again."""
+        profiling.uninstrument(self, "tk")
 
     def bbox(self, first, last=None):
         """Return the bounding box for the specified cell (range) as a
@@ -176,10 +319,14 @@ class Table(tkinter.Widget):
     def delete_cols(self, index, count=None, switches=None):
         args = self._handle_switches(switches) + (index, count)
         self.tk.call(self._w, "delete", "cols", *args)
+        if self._option_cache is not None:
+            self._option_cache.options_changed()
 
     def delete_rows(self, index, count=None, switches=None):
         args = self._handle_switches(switches) + (index, count)
         self.tk.call(self._w, "delete", "rows", *args)
+        if self._option_cache is not None:
+            self._option_cache.options_changed()
 
     def get(self, first, last=None):
         """Returns the value of the cells specified by the table indices
@@ -187,16 +334,19 @@ class Table(tkinter.Widget):
         return self.tk.call(self._w, "get", first, last)
 
     def height(self, row=None, **kwargs):
-        """If row and kwargs are not given, a list describing all rows for
-        which a width has been set is returned.
+        """If row and kwargs are not given, a dict mapping all rows for which
+        a height has been set to their height (as ints) is returned.
         If row is given, the height of that row is returned.
         If kwargs is given, then it sets the key/value pairs, where key is a
         row and value represents the height for the row."""
         if row is None and not kwargs:
             pairs = self.tk.splitlist(self.tk.call(self._w, "height"))
-            return dict(pair.split() for pair in pairs)
+            return dict(map(int, self.tk.splitlist(pair)) for pair in pairs)
         if row:
             return int(self.tk.call(self._w, "height", str(row)))
+        if self._batch is not None:
+            self._batch.height(kwargs)
+            return
         args = tkinter._flatten(list(kwargs.items()))
         self.tk.call(self._w, "height", *args)
 
@@ -236,10 +386,14 @@ class Table(tkinter.Widget):
     def insert_cols(self, index, count=None, switches=None):
         args = self._handle_switches(switches) + (index, count)
         self.tk.call(self._w, "insert", "cols", *args)
+        if self._option_cache is not None:
+            self._option_cache.options_changed()
 
     def insert_rows(self, index, count=None, switches=None):
         args = self._handle_switches(switches) + (index, count)
         self.tk.call(self._w, "insert", "rows", *args)
+        if self._option_cache is not None:
+            self._option_cache.options_changed()
 
     # def postscript(self, **kwargs):
     #    """Skip this command if you are under Windows.
@@ -255,6 +409,40 @@ class Table(tkinter.Widget):
     #
     #    return self.tk.call(self._w, 'postscript', *args)
 
+    def load(self, data, row_origin=0, col_origin=0, chunk_size=CHUNK_SIZE):
+        """Set the cells of a 2D grid, given as a list of lists, a 2D NumPy
+        array or an iterator over rows, so that data[0][0] is stored at the
+        cell row_origin,col_origin.
+
+        The cells are written with a few "set" calls of roughly chunk_size
+        cells each. As for set, the table must have an associated array.
+        Return the number of cells written."""
+        count = 0
+        for flat in _grid_chunks(data, row_origin, col_origin, chunk_size):
+            if self._batch is not None:
+                self._batch.set_cells(flat)
+            else:
+                self.tk.call(self._w, "set", *flat)
+            count += len(flat) // 2
+        return count
+
+    def read_region(self, first, last, as_array=False):
+        """Return the values of the rectangular region between the cells first
+        and last (table indices or (row, col) tuples) as a list of rows, built
+        from a single get call. If as_array is true, a 2D NumPy array of
+        strings is returned instead."""
+        row1, col1 = self._coords(first)
+        row2, col2 = self._coords(last)
+        row1, row2 = min(row1, row2), max(row1, row2)
+        col1, col2 = min(col1, col2), max(col1, col2)
+        values = self.tk.splitlist(
+            self.tk.call(self._w, "get", _index(row1, col1), _index(row2, col2))
+        )
+        ncols = col2 - col1 + 1
+        if as_array:
+            return _require_numpy().array(values, dtype=str).reshape(-1, ncols)
+        return [list(values[i : i + ncols]) for i in range(0, len(values), ncols)]
+
     def reread(self):
         """Rereads the old contents of the cell back into the editing buffer.
         Useful for a key binding when <Escape> is pressed to abort the edit
@@ -272,6 +460,8 @@ class Table(tkinter.Widget):
 
     def selection_anchor(self, index):
         self.tk.call(self._w, "selection", "anchor", index)
+        if self._option_cache is not None:
+            self._option_cache.cells_changed()
 
     # pylint: disable=arguments-differ  # TODO: maybe consider calling this method differently?
     def selection_clear(self, first, last=None):
@@ -280,6 +470,12 @@ class Table(tkinter.Widget):
     def selection_includes(self, index):
         return self.getboolean(self.tk.call(self._w, "selection", "includes", index))
 
+    def selection_ranges(self):
+        """Return the selected cells as a list of disjoint rectangular
+        CellRange, compressed by Tcl. See selection.Selection for the lazy
+        iteration and the export of the selection."""
+        return selection_ranges(self)
+
     def selection_set(self, first, last=None):
         self.tk.call(self._w, "selection", "set", first, last)
 
@@ -304,7 +500,12 @@ class Table(tkinter.Widget):
             return self.tk.call(self._w, "set", *args)
         if rc is None:
             args = tkinter._flatten(list(kwargs.items()))
-            self.tk.call(self._w, "set", *args)
+            if self._batch is not None:
+                self._batch.set_cells(args)
+            else:
+                self.tk.call(self._w, "set", *args)
+        elif self._batch is not None:
+            self._batch.set_line(rc, index, args)
         else:
             self.tk.call(self._w, "set", rc, index, args)
 
@@ -318,12 +519,31 @@ class Table(tkinter.Widget):
         and continues for the specified number of rows,cols specified by
         its value. A span of 0,0 unsets any span on that cell."""
         if kwargs:
+            if self._batch is not None:
+                self._batch.span(kwargs)
+                return
             args = tkinter._flatten(list(kwargs.items()))
             self.tk.call(self._w, "spans", *args)
         else:
             return self.tk.call(self._w, "spans", index)
 
+    def snapshot(self, path):
+        """Write the data, tags, column widths, row heights, spans and view
+        of the table to the file at path, in the binary format of the
+        snapshot module, and return its size."""
+        return snapshot.snapshot(self, path)
+
+    def restore(self, path):
+        """Restore the state saved by snapshot from the file at path, with a
+        few bulk calls."""
+        snapshot.restore(self, path)
+        if self._option_cache is not None:
+            self._option_cache.invalidate()
+
     def tag_cell(self, tagname, *args):
+        if args and self._batch is not None:
+            self._batch.tag_cell(tagname, args)
+            return
         return self.tk.call(self._w, "tag", "cell", tagname, *args)
 
     def tag_cget(self, tagname, option):
@@ -355,9 +575,13 @@ class Table(tkinter.Widget):
         for key, val in kwargs.items():
             args += (f"-{key}", val)
         self.tk.call(self._w, "tag", "configure", tagname, *args)
+        if self._option_cache is not None:
+            self._option_cache.tag_changed(tagname)
 
     def tag_delete(self, tagname):
         self.tk.call(self._w, "tag", "delete", tagname)
+        if self._option_cache is not None:
+            self._option_cache.tag_changed(tagname)
 
     def tag_exists(self, tagname):
         return self.getboolean(self.tk.call(self._w, "tag", "exists", tagname))
@@ -389,16 +613,19 @@ class Table(tkinter.Widget):
         return self.tk.call(self._w, "version")
 
     def width(self, column=None, **kwargs):
-        """If column and kwargs are not given, a dict describing all columns
-        for which a width has been set is returned.
+        """If column and kwargs are not given, a dict mapping all columns for
+        which a width has been set to their width (as ints) is returned.
         If column is given, the width of that column is returned.
         If kwargs is given, then it sets the key/value pairs, where key is a
         column and value represents the width for the column."""
         if column is None and not kwargs:
             pairs = self.tk.splitlist(self.tk.call(self._w, "width"))
-            return dict(pair.split() for pair in pairs)
+            return dict(map(int, self.tk.splitlist(pair)) for pair in pairs)
         if column is not None:
             return int(self.tk.call(self._w, "width", str(column)))
+        if self._batch is not None:
+            self._batch.width(kwargs)
+            return
         args = tkinter._flatten(list(kwargs.items()))
         self.tk.call(self._w, "width", *args)
 
@@ -2,6 +2,14 @@
 
 import tkinter
 
+try:
+    import numpy
+except ImportError:  # NumPy is an optional dependency.
+    numpy = None
+
+# The default number of cells written by a single bulk Tcl call.
+CHUNK_SIZE = 50000
+
 
 def _setup_master(master):
     if master is None:
@@ -13,3 +21,55 @@ def _setup_master(master):
                 "configured to not support default master"
             )
     return master
+
+
+def _is_ndarray(obj):
+    return numpy is not None and isinstance(obj, numpy.ndarray)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("This operation requires NumPy, which is not installed.")
+    return numpy
+
+
+def _index(row, col):
+    return f"{row:d},{col:d}"
+
+
+def _parse_index(index):
+    """Return the (row, col) tuple of ints for an index of the form "row,col",
+    or None if index does not have that form."""
+    if isinstance(index, tuple):
+        return int(index[0]), int(index[1])
+    row, _, col = str(index).partition(",")
+    try:
+        return int(row), int(col)
+    except ValueError:
+        return None
+
+
+def _grid_chunks(data, row_origin=0, col_origin=0, chunk_size=CHUNK_SIZE):
+    """Yield tuples of flattened "row,col", value pairs for the cells of data,
+    which can be a list of lists, a 2D NumPy array or an iterator over rows.
+    Values are converted with str, and None becomes an empty string.
+
+    Each tuple holds whole rows and roughly chunk_size cells, so that it can
+    be passed as the argument list of one "array set" or "set" Tcl call."""
+    if _is_ndarray(data):
+        if data.ndim != 2:
+            raise ValueError(f"Expected a 2D array, but got a {data.ndim}D array.")
+        data = data.tolist()
+    flat = []
+    limit = 2 * chunk_size
+    for row, values in enumerate(data, row_origin):
+        prefix = f"{row:d},"
+        for col, value in enumerate(values, col_origin):
+            flat.append(f"{prefix}{col:d}")
+            # _tkinter ends the arguments of a call at the first None.
+            flat.append("" if value is None else str(value))
+        if len(flat) >= limit:
+            yield tuple(flat)
+            flat = []
+    if flat:
+        yield tuple(flat)
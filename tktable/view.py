@@ -0,0 +1,178 @@
+# pylint: disable=missing-function-docstring
+
+"""
+A module that contains a data source which sorts and filters the rows of
+another one through an index, without moving any data.
+"""
+
+import array
+
+from tktable.utils import numpy
+from tktable.virtual import DataSource
+
+
+def _none_last(value):
+    return (value is None, value)
+
+
+def _none_last_reversed(value):
+    # Reversed, (False, None) sorts after all the (True, value).
+    return (value is not None, value)
+
+
+def _stable_order(values, reverse):
+    """Return the positions of values in stable sorted order."""
+    if numpy is not None:
+        keys = numpy.asarray(values)
+        if keys.ndim == 1 and keys.dtype.kind in "biufUS":
+            if not reverse:
+                return numpy.argsort(keys, kind="stable")
+            # A stable descending sort: sort the reversed keys and flip back.
+            flipped = numpy.argsort(keys[::-1], kind="stable")[::-1]
+            return len(keys) - 1 - flipped
+    key = _none_last_reversed if reverse else _none_last
+    return sorted(range(len(values)), key=lambda i: key(values[i]), reverse=reverse)
+
+
+class SortFilterView(DataSource):
+    """A data source showing the rows of source sorted and filtered.
+
+    The view keeps the list of source rows it shows, in display order, as an
+    index (a NumPy array or an array.array), so sorting costs one index
+    build and filters can be stacked and cleared without copying any cell.
+    A VirtualTable showing the view must be refreshed after the view
+    changes."""
+
+    def __init__(self, source):
+        self.source = source
+        self.sort_keys = []
+        self.filters = []
+        self._index = None
+
+    def row_count(self):
+        if self._index is None:
+            return self.source.row_count()
+        return len(self._index)
+
+    def col_count(self):
+        return self.source.col_count()
+
+    def source_row(self, row):
+        """Return the source row shown at row."""
+        if self._index is None:
+            return row
+        return int(self._index[row])
+
+    def get_cell(self, row, col):
+        return self.source.get_cell(self.source_row(row), col)
+
+    def get_block(self, first_row, first_col, last_row, last_col):
+        if self._index is None:
+            return self.source.get_block(first_row, first_col, last_row, last_col)
+        rows = [int(row) for row in self._index[first_row : last_row + 1]]
+        block = []
+        start = 0
+        # Read each run of consecutive source rows with a single call.
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                block.extend(
+                    self.source.get_block(rows[start], first_col, rows[i - 1], last_col)
+                )
+                start = i
+        return block
+
+    def format_value(self, col, value):
+        return self.source.format_value(col, value)
+
+    def set_cell(self, row, col, value):
+        self.source.set_cell(self.source_row(row), col, value)
+
+    def _column(self, col, rows):
+        nrows = self.source.row_count()
+        if len(rows) > nrows // 2:
+            values = [r[0] for r in self.source.get_block(0, col, nrows - 1, col)]
+            return [values[row] for row in rows]
+        return [self.source.get_cell(row, col) for row in rows]
+
+    def _as_index(self, rows):
+        if numpy is not None:
+            return numpy.asarray(rows, dtype=numpy.intp)
+        return array.array("q", rows)
+
+    def _rows(self):
+        if self._index is None:
+            return range(self.source.row_count())
+        return self._index
+
+    def _apply_sort(self, rows):
+        for col, reverse in reversed(self.sort_keys):
+            order = _stable_order(self._column(col, rows), reverse)
+            if numpy is not None:
+                rows = numpy.asarray(rows)[numpy.asarray(order, dtype=numpy.intp)]
+            else:
+                rows = [rows[i] for i in order]
+        return rows
+
+    def _apply_filter(self, rows, predicate, col):
+        if col is None:
+            ncols = self.source.col_count()
+            return [
+                row
+                for row in rows
+                if predicate(self.source.get_block(row, 0, row, ncols - 1)[0])
+            ]
+        values = self._column(col, rows)
+        return [row for row, value in zip(rows, values) if predicate(value)]
+
+    def sort_by(self, columns, reverse=False):
+        """Sort the rows by the values of one or more columns, the first one
+        being the primary key. reverse is a bool or a list of bools, one per
+        column."""
+        if isinstance(columns, int):
+            columns = [columns]
+        if isinstance(reverse, bool):
+            reverse = [reverse] * len(columns)
+        self.sort_keys = list(zip(columns, reverse))
+        self._index = self._as_index(self._apply_sort(list(self._rows())))
+        return self
+
+    def clear_sort(self):
+        """Show the rows in source order, keeping the filters."""
+        self.sort_keys = []
+        self._rebuild()
+        return self
+
+    def add_filter(self, predicate, col=None):
+        """Hide the rows for which predicate returns false. predicate is given
+        the value in col or, if col is None, the list of values of the row.
+        Filters are stacked: only the rows shown are tested."""
+        self.filters.append((predicate, col))
+        rows = self._apply_filter([int(row) for row in self._rows()], predicate, col)
+        self._index = self._as_index(rows)
+        return self
+
+    def remove_filter(self, predicate):
+        """Remove the filters using predicate."""
+        self.filters = [f for f in self.filters if f[0] is not predicate]
+        self._rebuild()
+        return self
+
+    def clear_filters(self):
+        """Show all rows, keeping the sort order."""
+        self.filters = []
+        self._rebuild()
+        return self
+
+    def _rebuild(self):
+        if not self.sort_keys and not self.filters:
+            self._index = None
+            return
+        rows = list(range(self.source.row_count()))
+        for predicate, col in self.filters:
+            rows = self._apply_filter(rows, predicate, col)
+        self._index = self._as_index(self._apply_sort(rows))
+
+    def refresh(self):
+        """Rebuild the index after the rows of the source changed."""
+        self._rebuild()
+        return self
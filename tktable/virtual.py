@@ -0,0 +1,280 @@
+# pylint: disable=missing-function-docstring
+
+"""
+A module that contains a command-driven table, which reads its cells from a
+Python data source rather than from a Tcl array.
+"""
+
+import collections
+
+from tktable.callbacks import RawCallback
+from tktable.table import Table
+from tktable.utils import _index
+
+
+class DataSource:
+    """Base class of the data sources read by a VirtualTable.
+
+    Subclasses must implement row_count, col_count and get_cell, where rows
+    and columns are 0-based. get_block can be overridden when the source can
+    return a region more cheaply than cell by cell. Sources which accept
+    edits should also define set_cell(row, col, value), which can raise
+    ValueError to reject a value, and sources which need their table
+    attach(table), called when it starts using them."""
+
+    def row_count(self):
+        raise NotImplementedError
+
+    def col_count(self):
+        raise NotImplementedError
+
+    def get_cell(self, row, col):
+        raise NotImplementedError
+
+    def get_block(self, first_row, first_col, last_row, last_col):
+        """Return the values of the region between the given cells (all
+        inclusive) as a list of rows."""
+        return [
+            [self.get_cell(row, col) for col in range(first_col, last_col + 1)]
+            for row in range(first_row, last_row + 1)
+        ]
+
+    def format_value(self, col, value):  # pylint: disable=unused-argument
+        """Return the string shown for a value of column col."""
+        if value is None:
+            return ""
+        return str(value)
+
+
+class ListSource(DataSource):
+    """A data source over a list of rows, each being a list of values."""
+
+    def __init__(self, rows, cols=None):
+        self.rows = rows
+        self.cols = cols
+
+    def row_count(self):
+        return len(self.rows)
+
+    def col_count(self):
+        if self.cols is not None:
+            return self.cols
+        return max((len(row) for row in self.rows), default=0)
+
+    def get_cell(self, row, col):
+        values = self.rows[row]
+        return values[col] if col < len(values) else None
+
+    def get_block(self, first_row, first_col, last_row, last_col):
+        width = last_col - first_col + 1
+        block = []
+        for values in self.rows[first_row : last_row + 1]:
+            values = list(values[first_col : last_col + 1])
+            # Short rows are padded, as get_cell reads their missing cells.
+            values.extend([None] * (width - len(values)))
+            block.append(values)
+        return block
+
+    def set_cell(self, row, col, value):
+        values = self.rows[row]
+        if col >= len(values):
+            values.extend([None] * (col + 1 - len(values)))
+        values[col] = value
+
+
+class CellCache:
+    """A bounded LRU mapping of (row, col) tuples to formatted cell strings.
+
+    generation is increased whenever entries are invalidated, so that values
+    read before can be told apart from fresh ones."""
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        """Return the string cached for key, or None."""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.generation += 1
+
+    def invalidate(self, first_row, first_col, last_row, last_col):
+        """Remove the entries of the region between the given cells (all
+        inclusive)."""
+        data = self._data
+        self.generation += 1
+        area = (last_row - first_row + 1) * (last_col - first_col + 1)
+        if area < len(data):
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    data.pop((row, col), None)
+        else:
+            stale = [
+                key
+                for key in data
+                if first_row <= key[0] <= last_row and first_col <= key[1] <= last_col
+            ]
+            for key in stale:
+                del data[key]
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class VirtualTable(Table):
+    """A table whose cells are read on demand from a DataSource through the
+    command option, so that the data is never copied into a Tcl array.
+
+    Cell (row, col) of the table shows the value at (row - roworigin,
+    col - colorigin) in the source, converted with formatter if given and
+    with the format_value method of the source otherwise. Formatted
+    strings are kept in a CellCache of cache_size entries, which must be
+    invalidated (see invalidate and refresh) when the source changes. The
+    dimensions of the source are read again by refresh only."""
+
+    def __init__(
+        self, master=None, source=None, formatter=None, cache_size=65536, **kw
+    ):
+        if source is None:
+            raise ValueError("A VirtualTable requires a data source.")
+        self.source = source
+        self.formatter = formatter
+        self.cell_cache = CellCache(cache_size)
+        self._row_origin = int(kw.get("roworigin", 0))
+        self._col_origin = int(kw.get("colorigin", 0))
+        self._shape = (source.row_count(), source.col_count())
+        kw.setdefault("rows", self._shape[0])
+        kw.setdefault("cols", self._shape[1])
+        kw["usecommand"] = 1
+        kw["command"] = RawCallback(self._cell_command, "rcis")
+        Table.__init__(self, master, **kw)
+        self._attach(source)
+
+    def _attach(self, source):
+        # Sources that need their table (e.g. to redraw cells) get it.
+        if hasattr(source, "attach"):
+            source.attach(self)
+
+    def _format(self, col, value):
+        if self.formatter is None:
+            return self.source.format_value(col, value)
+        if value is None:
+            return ""
+        return self.formatter(value)
+
+    def _cell_command(self, row, col, set_flag, value):
+        row -= self._row_origin
+        col -= self._col_origin
+        if set_flag:
+            if hasattr(self.source, "set_cell") and row >= 0 and col >= 0:
+                try:
+                    self.source.set_cell(row, col, value)
+                except ValueError:
+                    # The edit is rejected, rather than raised into Tcl, and
+                    # the cell keeps its value.
+                    value = self._format(col, self.source.get_cell(row, col))
+                self.cell_cache.invalidate(row, col, row, col)
+            return value
+        key = (row, col)
+        value = self.cell_cache.get(key)
+        if value is None:
+            if row < 0 or col < 0:
+                return ""
+            if row >= self._shape[0] or col >= self._shape[1]:
+                return ""
+            value = self._format(col, self.source.get_cell(row, col))
+            self.cell_cache.put(key, value)
+        return value
+
+    def _source_coords(self, index):
+        row, col = self._coords(index)
+        return row - self._row_origin, col - self._col_origin
+
+    def cache_region(self, first, last):
+        """Read the region between the table indices first and last from the
+        source with one get_block call and store it in the cell cache."""
+        row1, col1 = self._source_coords(first)
+        row2, col2 = self._source_coords(last)
+        row1, col1 = max(row1, 0), max(col1, 0)
+        row2 = min(row2, self._shape[0] - 1)
+        col2 = min(col2, self._shape[1] - 1)
+        if row1 > row2 or col1 > col2:
+            return
+        block = self.source.get_block(row1, col1, row2, col2)
+        put = self.cell_cache.put
+        for row, values in enumerate(block, row1):
+            for col, value in enumerate(values, col1):
+                put((row, col), self._format(col, value))
+
+    def invalidate(self, first=None, last=None):
+        """Drop the cached strings of the cells between the table indices
+        first and last (or of the whole table if first is not given) and
+        redraw them."""
+        if first is None:
+            self.cell_cache.clear()
+            self.clear_cache()
+            return
+        if last is None:
+            last = first
+        row1, col1 = self._source_coords(first)
+        row2, col2 = self._source_coords(last)
+        self.cell_cache.invalidate(
+            min(row1, row2), min(col1, col2), max(row1, row2), max(col1, col2)
+        )
+        # first and last can be (row, col) tuples, which Tcl does not take.
+        self.clear_cache(_index(*self._coords(first)), _index(*self._coords(last)))
+
+    def invalidate_rows(self, first, last=None):
+        """Drop the cached strings of the source rows first to last (both
+        inclusive) and redraw them."""
+        if last is None:
+            last = first
+        ncols = self._shape[1]
+        self.cell_cache.invalidate(first, 0, last, ncols - 1)
+        self.clear_cache(
+            _index(first + self._row_origin, self._col_origin),
+            _index(last + self._row_origin, ncols - 1 + self._col_origin),
+        )
+
+    def refresh(self):
+        """Resize the table to the current dimensions of the source and
+        redraw all of its cells."""
+        self._shape = (self.source.row_count(), self.source.col_count())
+        self.configure(rows=self._shape[0], cols=self._shape[1])
+        self.invalidate()
+
+    def set_source(self, source):
+        """Replace the data source and redraw the table."""
+        self.source = source
+        self._attach(source)
+        self.refresh()
@@ -0,0 +1,162 @@
+# pylint: disable=missing-function-docstring, too-many-instance-attributes
+# pylint: disable=too-many-arguments, too-few-public-methods
+
+"""
+A module that contains a column of embedded widgets, which only creates as
+many widgets as there are visible rows and moves them as the table scrolls.
+"""
+
+import tkinter
+
+from tktable.utils import _index
+
+
+class _Slot:
+    __slots__ = ("widget", "variable", "row")
+
+    def __init__(self, widget, variable):
+        self.widget = widget
+        self.variable = variable
+        self.row = None
+
+
+class WidgetColumn:
+    """Show a widget in each visible cell of column col of table, from a
+    pool of at most as many widgets as there are visible rows, instead of one
+    embedded window per row.
+
+    factory(table, variable) must return a new widget, child of table, whose
+    value is held by variable, a new instance of variable_class. As the table
+    scrolls (see start, stop and update), the widgets of the rows which are
+    no longer visible are moved with window_move to the rows which became
+    visible, and their variable is set to get_value(row). When the user
+    changes the value of a widget, set_value(row, value) is called. Rows are
+    table rows, and the rows above first_row (the first row after the title
+    rows by default) get no widget. window_options are passed to
+    window_configure when a widget is embedded (e.g. sticky="news")."""
+
+    def __init__(
+        self,
+        table,
+        col,
+        factory,
+        get_value,
+        set_value=None,
+        *,
+        variable_class=tkinter.StringVar,
+        first_row=None,
+        interval=50,
+        window_options=None,
+    ):
+        self.table = table
+        self.col = col
+        self.factory = factory
+        self.get_value = get_value
+        self.set_value = set_value
+        self.variable_class = variable_class
+        if first_row is None:
+            first_row = int(table.cget("roworigin")) + int(table.cget("titlerows"))
+        self.first_row = first_row
+        self.interval = interval
+        self.window_options = window_options or {}
+        self.slots = []
+        self._by_row = {}
+        self._viewport = None
+        self._updating = False
+        self._after_id = None
+
+    def __len__(self):
+        """Return the number of widgets created."""
+        return len(self.slots)
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def start(self):
+        """Update the column now and then every interval milliseconds."""
+        if self._after_id is None:
+            self._tick()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.table.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        self.update()
+        self._after_id = self.table.after(self.interval, self._tick)
+
+    def _visible_rows(self):
+        top = max(self.table.index("topleft", "row"), self.first_row)
+        bottom = self.table.index("bottomright", "row")
+        return top, bottom
+
+    def update(self, force=False):
+        """Give a widget to each visible row of the column, if the viewport
+        changed since the last update or force is true."""
+        viewport = self._visible_rows()
+        if viewport == self._viewport and not force:
+            return
+        self._viewport = viewport
+        top, bottom = viewport
+        visible = range(top, bottom + 1)
+        free = [slot for slot in self.slots if slot.row not in visible]
+        for row in visible:
+            slot = self._by_row.get(row)
+            if slot is None:
+                slot = free.pop() if free else self._new_slot()
+                self._place(slot, row)
+            elif force:
+                self._load(slot)
+
+    def _new_slot(self):
+        variable = self.variable_class(self.table)
+        slot = _Slot(self.factory(self.table, variable), variable)
+        variable.trace_add("write", lambda *_: self._changed(slot))
+        self.slots.append(slot)
+        return slot
+
+    def _place(self, slot, row):
+        index = _index(row, self.col)
+        if slot.row is None:
+            self.table.window_configure(
+                index, window=slot.widget, **self.window_options
+            )
+        else:
+            del self._by_row[slot.row]
+            self.table.window_move(_index(slot.row, self.col), index)
+        slot.row = row
+        self._by_row[row] = slot
+        self._load(slot)
+
+    def _load(self, slot):
+        self._updating = True
+        try:
+            slot.variable.set(self.get_value(slot.row))
+        finally:
+            self._updating = False
+
+    def _changed(self, slot):
+        if not self._updating and self.set_value is not None:
+            self.set_value(slot.row, slot.variable.get())
+
+    def refresh(self):
+        """Set the widgets again from get_value, e.g. after the data changed."""
+        for slot in self.slots:
+            if slot.row is not None:
+                self._load(slot)
+
+    def destroy(self):
+        """Stop updating and delete the embedded widgets."""
+        self.stop()
+        indexes = [
+            _index(slot.row, self.col) for slot in self.slots if slot.row is not None
+        ]
+        if indexes:
+            self.table.window_delete(*indexes)
+        for slot in self.slots:
+            slot.widget.destroy()
+        self.slots = []
+        self._by_row = {}
+        self._viewport = None